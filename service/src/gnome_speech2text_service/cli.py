@@ -7,6 +7,7 @@ This is the entry point that gets called when users run 'speech2text-extension-s
 
 import sys
 import argparse
+from .logger import setup_logging, shutdown_logging
 from .service import main as service_main
 
 
@@ -28,17 +29,49 @@ def main():
     parser.add_argument(
         "--debug",
         action="store_true",
-        help="Enable debug logging"
+        help="Enable debug logging (verbose journal output and console logging)"
+    )
+    
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Write a profile report for every recording to "
+        "$XDG_STATE_HOME/speech2text-extension-service/profiles (implied by --debug)"
+    )
+    
+    parser.add_argument(
+        "--benchmark-scheduling",
+        metavar="AUDIO",
+        help="Transcribe AUDIO under each inference scheduling preset and report "
+        "latency and event-loop responsiveness, then exit"
+    )
+    
+    parser.add_argument(
+        "--model",
+        default="base",
+        help="Whisper model used by --benchmark-scheduling (default: base)"
+    )
+    
+    parser.add_argument(
+        "--device",
+        choices=["cpu", "gpu"],
+        default="cpu",
+        help="Device used by --benchmark-scheduling (default: cpu)"
     )
     
     args = parser.parse_args()
     
-    # Pass debug flag to the service if needed
-    if args.debug:
-        sys.argv.append("--debug")
+    if args.benchmark_scheduling:
+        from .scheduling import run_benchmark
+        
+        setup_logging(args.debug)
+        try:
+            return run_benchmark(args.benchmark_scheduling, args.model, args.device)
+        finally:
+            shutdown_logging()
     
     # Start the service
-    return service_main()
+    return service_main(debug=args.debug, profile=args.debug or args.profile)
 
 
 if __name__ == "__main__":
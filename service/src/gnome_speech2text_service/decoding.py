@@ -0,0 +1,151 @@
+"""
+Adaptive decoding options for model.transcribe().
+
+Whisper's defaults use the same greedy/temperature-fallback behaviour for a two-second
+"yes" and a five-minute dictation. DecodingPolicy picks beam search vs. greedy decoding,
+the fallback temperature schedule and condition_on_previous_text per clip, from a
+latency-budget preset, the clip duration and a target deadline. Achieved real-time factors
+are fed back so later choices use what this machine and model actually deliver.
+
+Under a deadline, beam search is only used once it has been measured to fit: decoding
+starts greedy (whisper's default) and every PROBE_INTERVAL-th short clip tries beam search
+to measure it, so a slow or outdated estimate is re-checked rather than kept forever.
+"""
+
+import threading
+
+# Deadlines shorter than this are not meaningful (model warm-up, ffmpeg decode, ...).
+MIN_DEADLINE = 2.0
+
+# Weight of the newest real-time-factor measurement in the running estimate.
+RTF_SMOOTHING = 0.3
+
+# Every n-th clip of at most PROBE_MAX_SECONDS tries beam search to (re)measure its speed.
+PROBE_INTERVAL = 10
+PROBE_MAX_SECONDS = 30.0
+
+_FULL_TEMPERATURES = (0.0, 0.2, 0.4, 0.6, 0.8, 1.0)
+_SHORT_TEMPERATURES = (0.0, 0.4, 0.8)
+
+PRESETS = {
+    # target_rtf: deadline as a fraction of clip duration (0 = no deadline).
+    # best_of None keeps whisper's default of one sample per fallback temperature.
+    "fast": {
+        "target_rtf": 0.2,
+        "beam_size": None,
+        "best_of": None,
+        "temperatures": _SHORT_TEMPERATURES,
+        "condition_on_previous_text": False,
+    },
+    "balanced": {
+        "target_rtf": 0.5,
+        "beam_size": 5,
+        "best_of": None,
+        "temperatures": _FULL_TEMPERATURES,
+        "condition_on_previous_text": True,
+    },
+    "accurate": {
+        "target_rtf": 0.0,
+        "beam_size": 5,
+        "best_of": 5,
+        "temperatures": _FULL_TEMPERATURES,
+        "condition_on_previous_text": True,
+    },
+}
+
+# Beyond this, conditioning on previous text mostly risks repetition loops that cascade.
+LONG_CLIP_SECONDS = 120.0
+
+
+class DecodingPolicy:
+    """Choose transcribe() options per clip and learn achieved real-time factors."""
+
+    def __init__(self, preset: str = "balanced", deadline: float = 0.0):
+        if preset not in PRESETS:
+            raise ValueError(f"Unknown decoding preset: {preset}. Allowed: {', '.join(PRESETS)}")
+        self.preset = preset
+        self.deadline = max(0.0, float(deadline))
+        self._lock = threading.Lock()
+        self._rtf = {}  # "beam" / "greedy" -> smoothed real-time factor
+        self._clips = 0
+        self._probing = False  # the last beam choice was a probe, not a measured fit
+
+    def __repr__(self):
+        return f"{self.preset}(deadline={self.deadline:g})"
+
+    def reset_estimates(self):
+        """Forget learned speeds (e.g. after switching model or device)."""
+        with self._lock:
+            self._rtf.clear()
+
+    def _deadline_for(self, duration: float, target_rtf: float) -> float:
+        if self.deadline > 0:
+            return self.deadline
+        if target_rtf > 0:
+            return max(MIN_DEADLINE, target_rtf * duration)
+        return 0.0
+
+    def choose(self, duration: float, measure: bool = True) -> dict:
+        """
+        Return keyword arguments for model.transcribe() for a clip of duration seconds.
+
+        measure=False is for clips whose timing will not be recorded; they never probe.
+        """
+        preset = PRESETS[self.preset]
+        deadline = self._deadline_for(duration, preset["target_rtf"])
+        with self._lock:
+            beam_rtf = self._rtf.get("beam")
+            greedy_rtf = self._rtf.get("greedy")
+            if measure:
+                self._clips += 1
+            probe = measure and self._clips % PROBE_INTERVAL == 0
+
+        beam_size = preset["beam_size"]
+        temperatures = preset["temperatures"]
+        condition = preset["condition_on_previous_text"]
+
+        if deadline > 0:
+            fits = beam_rtf is not None and beam_rtf * duration <= deadline
+            if beam_size and not fits and not (probe and duration <= PROBE_MAX_SECONDS):
+                beam_size = None
+            if measure:
+                with self._lock:
+                    self._probing = bool(beam_size) and not fits
+            if beam_size is None and greedy_rtf is not None and greedy_rtf * duration > deadline:
+                # Even greedy is too slow; cap the number of fallback re-decodes.
+                temperatures = _SHORT_TEMPERATURES
+            if duration > LONG_CLIP_SECONDS:
+                condition = False
+
+        options = {
+            "temperature": temperatures,
+            "condition_on_previous_text": condition,
+        }
+        if beam_size:
+            options["beam_size"] = beam_size
+        if preset["best_of"]:
+            options["best_of"] = preset["best_of"]
+        return options
+
+    def record(self, options: dict, duration: float, elapsed: float) -> float:
+        """Feed back the measured time for a clip; returns its real-time factor."""
+        if duration <= 0:
+            return 0.0
+        rtf = elapsed / duration
+        key = "beam" if options.get("beam_size") else "greedy"
+        with self._lock:
+            previous = self._rtf.get(key)
+            if previous is None or (key == "beam" and self._probing):
+                # A probe re-measures from scratch instead of nudging a possibly stale estimate.
+                self._rtf[key] = rtf
+                self._probing = False
+            else:
+                self._rtf[key] = previous + RTF_SMOOTHING * (rtf - previous)
+        return rtf
+
+
+def describe_options(options: dict) -> str:
+    """Compact one-line summary of chosen decoding options for logs and history."""
+    mode = f"beam{options['beam_size']}" if options.get("beam_size") else "greedy"
+    temps = "/".join(f"{t:g}" for t in options.get("temperature", ()))
+    return f"{mode},temps={temps},condition={options.get('condition_on_previous_text')}"
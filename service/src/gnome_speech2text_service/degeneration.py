@@ -0,0 +1,291 @@
+"""
+Early termination of degenerate Whisper decoding.
+
+On low-energy audio or after a misrecognition Whisper can fall into a repetition loop
+("Thank you. Thank you. Thank you. ..."). Left alone, each decoding pass runs until the
+token limit, is rejected for its compression ratio and retried at every fallback
+temperature, and the last junk result is still returned.
+
+DegenerationGuard wraps model.decode on the model instance and watches decoding at two
+levels:
+
+- token level: a logit filter forces end-of-text as soon as the text tokens end in an
+  n-gram repeated several times, so a looping pass stops early;
+- segment level: a pass that is nothing but a loop on what is probably not speech (high
+  no-speech probability) skips the segment; one that keeps looping stops the temperature
+  fallback and keeps the text before the loop.
+
+Aborts, skips and the estimated decoding time saved are counted. The guard builds on
+whisper's DecodingTask internals; if they do not fit the installed whisper version it
+disables itself and decoding goes through the model's own decode().
+"""
+
+import math
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import replace
+
+import torch
+from whisper.decoding import DecodingTask, LogitFilter
+from whisper.tokenizer import get_tokenizer
+from whisper.utils import compression_ratio
+
+from .logger import get_logger
+
+log = get_logger()
+
+# Longest repeating unit looked for, in text tokens.
+MAX_PERIOD = 24
+# A loop must repeat at least this many times and cover at least MIN_SPAN tokens.
+MIN_REPEATS = 3
+MIN_SPAN = 16
+
+# Same threshold transcribe() uses to reject a pass as too repetitive.
+COMPRESSION_LIMIT = 2.4
+# A pass that is only a loop, with at least this no-speech probability, is treated as
+# hallucination and skipped.
+NO_SPEECH_SKIP = 0.3
+# Degenerate passes per segment before the remaining fallback temperatures are given up.
+MAX_DEGENERATE_PASSES = 2
+# transcribe()'s default logprob_threshold; truncated results are reported at least this high.
+LOGPROB_FLOOR = -1.0
+
+_DEFAULT_TEMPERATURES = (0.0, 0.2, 0.4, 0.6, 0.8, 1.0)
+
+
+def find_loop(tokens: list):
+    """
+    (start, period) of a repetition loop at the end of tokens, or None.
+
+    start is where the repeated region begins; tokens[:start + period] keeps one copy.
+    """
+    n = len(tokens)
+    for period in range(1, min(MAX_PERIOD, n // MIN_REPEATS) + 1):
+        span = period * max(MIN_REPEATS, math.ceil(MIN_SPAN / period))
+        if span > n:
+            continue
+        tail = tokens[n - span :]
+        if tail[period:] != tail[:-period]:
+            continue
+        start = n - span
+        while start > 0 and tokens[start - 1] == tokens[start - 1 + period]:
+            start -= 1
+        return start, period
+    return None
+
+
+class _StopRepetition(LogitFilter):
+    """Force end-of-text for sequences whose text tokens end in a repetition loop."""
+
+    def __init__(self, tokenizer, sample_begin: int):
+        self.eot = tokenizer.eot
+        self.timestamp_begin = tokenizer.timestamp_begin
+        self.sample_begin = sample_begin
+        self.stopped = set()
+
+    def apply(self, logits: torch.Tensor, tokens: torch.Tensor):
+        if tokens.shape[1] - self.sample_begin < MIN_SPAN:
+            return
+        for k in range(tokens.shape[0]):
+            seq = tokens[k, self.sample_begin :].tolist()
+            if seq and seq[-1] == self.eot:
+                continue
+            # Timestamps differ between repetitions; only the text has to repeat.
+            text_tokens = [t for t in seq if t < self.timestamp_begin]
+            if find_loop(text_tokens) is not None:
+                logits[k, :] = -math.inf
+                logits[k, self.eot] = 0.0
+                self.stopped.add(k)
+
+
+class _GuardedDecodingTask(DecodingTask):
+    def __init__(self, model, options):
+        super().__init__(model, options)
+        # Last, so no other filter can un-mask the forced end-of-text.
+        self.repetition_filter = _StopRepetition(self.tokenizer, self.sample_begin)
+        self.logit_filters.append(self.repetition_filter)
+        self.encoder_seconds = 0.0
+
+    def _get_audio_features(self, mel):
+        started = time.perf_counter()
+        try:
+            return super()._get_audio_features(mel)
+        finally:
+            self.encoder_seconds = time.perf_counter() - started
+
+
+class DegenerationGuard:
+    """Watch and cut short degenerate decoding passes of a Whisper model."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.aborts = 0  # passes stopped at a repetition loop
+        self.skipped_segments = 0
+        self.truncated_segments = 0  # fallbacks given up, text before the loop kept
+        self.seconds_saved = 0.0
+        self._disabled = False  # set when the guarded task does not work with this whisper
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "aborts": self.aborts,
+                "skipped": self.skipped_segments,
+                "truncated": self.truncated_segments,
+                "seconds_saved": self.seconds_saved,
+            }
+
+    def install(self, model):
+        """Route model.decode (used by transcribe()) through the guard; idempotent."""
+        if getattr(model.decode, "_degeneration_guard", None) is self:
+            return
+        original = model.decode
+
+        def decode(mel, options, **kwargs):
+            if not self._disabled:
+                try:
+                    return self._decode(model, mel, options, **kwargs)
+                except Exception as e:
+                    self._disabled = True
+                    log.warning(f"Degeneration guard disabled, falling back to plain decoding: {e}")
+            return original(mel, options, **kwargs)
+
+        decode._degeneration_guard = self
+        model.decode = decode
+
+    @contextmanager
+    def track(self, model, temperatures=_DEFAULT_TEMPERATURES):
+        """Guard transcriptions run in this block; yields per-clip counters."""
+        self.install(model)
+        clip = {"aborts": 0, "skipped": 0, "truncated": 0, "seconds_saved": 0.0}
+        self._local.clip = clip
+        self._local.temperatures = (
+            tuple(temperatures) if isinstance(temperatures, (list, tuple)) else (temperatures,)
+        )
+        self._local.degenerate_passes = 0
+        try:
+            yield clip
+        finally:
+            self._local.clip = None
+
+    def _count(self, key: str, seconds: float = 0.0):
+        with self._lock:
+            if key == "aborts":
+                self.aborts += 1
+            elif key == "skipped":
+                self.skipped_segments += 1
+            else:
+                self.truncated_segments += 1
+            self.seconds_saved += seconds
+        clip = getattr(self._local, "clip", None)
+        if clip is not None:
+            clip[key] += 1
+            clip["seconds_saved"] += seconds
+
+    def _remaining_passes(self, temperature: float) -> int:
+        temperatures = getattr(self._local, "temperatures", _DEFAULT_TEMPERATURES)
+        index = min(range(len(temperatures)), key=lambda i: abs(temperatures[i] - temperature))
+        if index == 0:
+            self._local.degenerate_passes = 0
+        return len(temperatures) - 1 - index
+
+    @torch.no_grad()
+    def _decode(self, model, mel, options, **kwargs):
+        if kwargs:
+            options = replace(options, **kwargs)
+        single = mel.ndim == 2
+        if single:
+            mel = mel.unsqueeze(0)
+
+        started = time.perf_counter()
+        task = _GuardedDecodingTask(model, options)
+        results = task.run(mel)
+        elapsed = time.perf_counter() - started
+
+        if len(results) == 1:
+            results = [self._judge(task, results[0], options, elapsed)]
+        return results[0] if single else results
+
+    def _judge(self, task, result, options, elapsed):
+        remaining = self._remaining_passes(options.temperature)
+
+        # Estimate what the pass would have cost had it run to the token limit.
+        full_pass = elapsed
+        if task.repetition_filter.stopped:
+            steps = len(result.tokens) + 1
+            per_token = max(0.0, elapsed - task.encoder_seconds) / steps
+            full_pass = task.encoder_seconds + per_token * max(steps, task.sample_len)
+            self._count("aborts", full_pass - elapsed)
+
+        text_tokens = [t for t in result.tokens if t < task.tokenizer.timestamp_begin]
+        loop = find_loop(text_tokens)
+        if loop is None and result.compression_ratio <= COMPRESSION_LIMIT:
+            return result
+
+        self._local.degenerate_passes = getattr(self._local, "degenerate_passes", 0) + 1
+        if loop is not None and loop[0] == 0 and result.no_speech_prob > NO_SPEECH_SKIP:
+            # transcribe() skips a segment with high no_speech_prob and low avg_logprob.
+            self._count("skipped", remaining * full_pass)
+            log.debug(
+                "Skipping degenerate segment (no_speech_prob=%.2f, compression_ratio=%.2f)",
+                result.no_speech_prob,
+                result.compression_ratio,
+            )
+            return replace(
+                result,
+                tokens=[],
+                text="",
+                no_speech_prob=1.0,
+                avg_logprob=-math.inf,
+                compression_ratio=0.0,
+            )
+
+        if loop is None:
+            return result
+
+        if self._local.degenerate_passes >= MAX_DEGENERATE_PASSES or remaining == 0:
+            self._count("truncated", remaining * full_pass)
+            truncated = self._truncate(task, result, text_tokens, loop)
+            log.debug("Giving up fallback for looping segment, kept %d chars", len(truncated.text))
+            return truncated
+
+        # A pass cut short can come in under the compression limit; make transcribe() fall
+        # back exactly as it would have after the full looping pass.
+        return replace(result, compression_ratio=math.inf)
+
+    def _truncate(self, task, result, text_tokens, loop):
+        """result reduced to the text before its repetition loop, plus one copy of it."""
+        tokenizer = task.tokenizer
+        start, period = loop
+        kept_text = text_tokens[: start + period]
+
+        # Cut the original tokens after the last kept text token so timestamps survive;
+        # transcribe() uses them to place segments and to advance past the window.
+        timestamp_begin = tokenizer.timestamp_begin
+        cut, seen = 0, 0
+        while seen < len(kept_text):
+            if result.tokens[cut] < timestamp_begin:
+                seen += 1
+            cut += 1
+        kept = list(result.tokens[:cut])
+        later = [t for t in result.tokens[cut:] if t >= timestamp_begin]
+        if later:
+            # Close the last segment at the end of the loop, so decoding resumes after it.
+            kept.append(later[-1])
+        if result.language and result.language != tokenizer.language:
+            tokenizer = get_tokenizer(
+                task.model.is_multilingual,
+                num_languages=task.model.num_languages,
+                language=result.language,
+                task=task.options.task,
+            )
+        text = tokenizer.decode(kept_text).strip()
+        # Reported within transcribe()'s default limits so no further fallback is attempted.
+        return replace(
+            result,
+            tokens=kept,
+            text=text,
+            compression_ratio=min(compression_ratio(text) if text else 0.0, COMPRESSION_LIMIT),
+            avg_logprob=max(result.avg_logprob, LOGPROB_FLOOR),
+        )
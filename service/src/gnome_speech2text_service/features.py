@@ -0,0 +1,152 @@
+"""
+Incremental log-mel feature extraction for audio captured by the service.
+
+Whisper normally computes the log-mel spectrogram of the whole clip inside
+model.transcribe(), after recording has stopped. IncrementalLogMel computes the STFT/mel
+frames while PCM arrives from ffmpeg, so at stop time only the final normalization is left
+and transcription can go straight to the encoder. The output matches
+whisper.audio.log_mel_spectrogram(audio, n_mels, padding=N_SAMPLES).
+"""
+
+import importlib
+import sys
+
+import numpy as np
+import torch
+from whisper.audio import HOP_LENGTH, N_FFT, N_SAMPLES, mel_filters
+
+# torch.stft centers frames, reflect-padding N_FFT // 2 samples on each side.
+_CENTER_PAD = N_FFT // 2
+
+
+# Models with 128 mel bins; "large" has been an alias of large-v3 since whisper 20231117.
+_128_MEL_MODELS = {"large", "large-v3", "large-v3-turbo", "turbo"}
+
+
+def n_mels_for_model(model_name: str) -> int:
+    """Number of mel bins a Whisper model expects, for when the model isn't loaded yet."""
+    return 128 if model_name in _128_MEL_MODELS else 80
+
+
+class IncrementalLogMel:
+    """
+    Build a Whisper-compatible log-mel spectrogram from 16 kHz mono int16 PCM chunks.
+
+    feed() turns every complete STFT frame into un-normalized log10 mel energies right away;
+    finalize() appends whisper's 30s of zero padding, applies the clip-wide dynamic range
+    clamp and scaling, and returns the (n_mels, n_frames) tensor.
+    """
+
+    def __init__(self, n_mels: int = 80):
+        self.n_mels = n_mels
+        self.num_samples = 0
+        self.sumsq = 0.0
+        self._filters = mel_filters("cpu", n_mels).numpy()
+        # torch.hann_window default is periodic.
+        self._window = (0.5 - 0.5 * np.cos(2 * np.pi * np.arange(N_FFT) / N_FFT)).astype(np.float32)
+        self._raw = []  # samples held back until the left reflect pad can be built
+        self._pending = None  # centered signal not yet consumed by a frame
+        self._chunks = []
+        self._max = -np.inf
+
+    @property
+    def rms(self) -> float:
+        """RMS of all samples fed so far (normalized 0..1)."""
+        return float(np.sqrt(self.sumsq / self.num_samples)) if self.num_samples else 0.0
+
+    def feed(self, pcm: bytes):
+        samples = np.frombuffer(pcm, dtype="<i2").astype(np.float32) / 32768.0
+        if not samples.size:
+            return
+        self.num_samples += samples.size
+        self.sumsq += float(np.dot(samples, samples))
+
+        if self._pending is None:
+            self._raw.append(samples)
+            raw = np.concatenate(self._raw)
+            if raw.size <= _CENTER_PAD:
+                self._raw = [raw]
+                return
+            self._raw = []
+            self._pending = np.concatenate([raw[1 : _CENTER_PAD + 1][::-1], raw])
+        else:
+            self._pending = np.concatenate([self._pending, samples])
+
+        self._consume()
+
+    def _consume(self):
+        available = self._pending.size - N_FFT
+        if available < 0:
+            return
+        n_frames = available // HOP_LENGTH + 1
+        frames = np.lib.stride_tricks.as_strided(
+            self._pending,
+            shape=(n_frames, N_FFT),
+            strides=(self._pending.strides[0] * HOP_LENGTH, self._pending.strides[0]),
+            writeable=False,
+        )
+        magnitudes = np.abs(np.fft.rfft(frames * self._window, axis=-1)) ** 2
+        mel = self._filters @ magnitudes.T.astype(np.float32)
+        log_spec = np.log10(np.maximum(mel, 1e-10)).astype(np.float32)
+        self._max = max(self._max, float(log_spec.max()))
+        self._chunks.append(log_spec)
+        self._pending = self._pending[n_frames * HOP_LENGTH :].copy()
+
+    def finalize(self, padding: int = N_SAMPLES) -> torch.Tensor:
+        """Return the normalized log-mel spectrogram of everything fed, plus padding zeros."""
+        tail = np.zeros(padding + _CENTER_PAD, dtype=np.float32)
+        if self._pending is None:
+            # Too short to have started: reflect-pad over the zero padding like torch would.
+            raw = np.concatenate(self._raw + [tail])
+            self._pending = np.concatenate([raw[1 : _CENTER_PAD + 1][::-1], raw])
+            self._raw = []
+        else:
+            # Whisper's zero padding is longer than the reflect pad, so the right edge is zeros.
+            self._pending = np.concatenate([self._pending, tail])
+        self._consume()
+
+        # stft yields one frame more than whisper keeps (it drops the last).
+        n_frames = (self.num_samples + padding) // HOP_LENGTH
+        log_spec = np.concatenate(self._chunks, axis=1)[:, :n_frames]
+        log_spec = np.maximum(log_spec, self._max - 8.0)
+        log_spec = (log_spec + 4.0) / 4.0
+        return torch.from_numpy(np.ascontiguousarray(log_spec, dtype=np.float32))
+
+
+class PrecomputedMel:
+    """
+    Audio input for model.transcribe() whose log-mel spectrogram is already computed.
+
+    Falls back to computing features from source (an audio file path or the float32
+    waveform) when whisper asks for a different mel layout than the precomputed one (e.g.
+    the model was switched mid-recording). source is None for slices of a longer clip,
+    which are only made once the layout is known to match.
+    """
+
+    def __init__(self, mel: torch.Tensor, source, num_samples: int):
+        self.mel = mel
+        self.source = source
+        self.num_samples = num_samples
+
+
+def install_mel_passthrough():
+    """
+    Let whisper's transcribe() accept PrecomputedMel in place of audio.
+
+    transcribe() always calls log_mel_spectrogram(audio, n_mels, padding=N_SAMPLES) on its
+    input; wrap that module-level reference so precomputed features are returned as-is.
+    """
+    module = sys.modules.get("whisper.transcribe") or importlib.import_module("whisper.transcribe")
+    original = module.log_mel_spectrogram
+    if getattr(original, "_precomputed_passthrough", False):
+        return
+
+    def log_mel_spectrogram(audio, n_mels=80, padding=0, *args, **kwargs):
+        if isinstance(audio, PrecomputedMel):
+            if audio.mel.shape[0] == n_mels and padding == N_SAMPLES:
+                return audio.mel
+            audio = audio.source
+        return original(audio, n_mels, padding, *args, **kwargs)
+
+    log_mel_spectrogram._precomputed_passthrough = True
+    module.log_mel_spectrogram = log_mel_spectrogram
@@ -0,0 +1,286 @@
+"""
+Local transcription history for the Speech2Text service.
+
+Finished transcriptions are queued and written by a background thread in batched
+transactions, so the recording/transcription path never waits on disk I/O. Entries are
+indexed with SQLite FTS5 for ranked full-text search; listing uses keyset pagination so
+both stay fast on large histories. Retention limits are stored in the database, so they
+survive restarts, and are enforced after each batch.
+"""
+
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+from .logger import get_logger
+
+log = get_logger()
+
+# Entries written per transaction at most, and how long to wait for a batch to fill up.
+BATCH_SIZE = 500
+BATCH_WAIT = 0.5
+
+# Rows removed by retention before the FTS index is optimized and free pages are reclaimed.
+COMPACT_AFTER_DELETES = 1000
+
+_COLUMNS = (
+    "id, recording_id, created_at, model, language, record_seconds, transcribe_seconds, text, "
+    "decoding, rtf"
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS transcriptions (
+    id INTEGER PRIMARY KEY,
+    recording_id TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    completed_at REAL NOT NULL,
+    model TEXT NOT NULL,
+    language TEXT NOT NULL,
+    record_seconds REAL NOT NULL,
+    transcribe_seconds REAL NOT NULL,
+    decoding TEXT NOT NULL DEFAULT '',
+    rtf REAL NOT NULL DEFAULT 0,
+    text TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS transcriptions_created_at ON transcriptions (created_at);
+CREATE TABLE IF NOT EXISTS settings (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+# Queued instead of an entry when the retention limits change.
+_RETENTION_CHANGED = object()
+
+_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS transcriptions_fts USING fts5(
+    text, content='transcriptions', content_rowid='id'
+);
+CREATE TRIGGER IF NOT EXISTS transcriptions_ai AFTER INSERT ON transcriptions BEGIN
+    INSERT INTO transcriptions_fts (rowid, text) VALUES (new.id, new.text);
+END;
+CREATE TRIGGER IF NOT EXISTS transcriptions_ad AFTER DELETE ON transcriptions BEGIN
+    INSERT INTO transcriptions_fts (transcriptions_fts, rowid, text) VALUES ('delete', old.id, old.text);
+END;
+"""
+
+
+def default_history_path() -> str:
+    data_home = os.environ.get("XDG_DATA_HOME") or os.path.expanduser("~/.local/share")
+    return os.path.join(data_home, "speech2text-extension-service", "history.sqlite3")
+
+
+def _fts_query(query: str) -> str:
+    """Quote each word so user input is never parsed as FTS5 query syntax."""
+    terms = [term.replace('"', '""') for term in query.split()]
+    return " ".join(f'"{term}"' for term in terms if term)
+
+
+class HistoryStore:
+    """
+    Append-only transcription history backed by SQLite with an FTS5 index.
+
+    max_entries and max_age_days are defaults for a database without stored limits.
+    """
+
+    def __init__(self, path: str = None, max_entries: int = 100000, max_age_days: int = 0):
+        self.path = path or default_history_path()
+        self.max_entries = max_entries
+        self.max_age_days = max_age_days
+        self.has_fts = False
+        self._queue = queue.Queue()
+        self._deleted_since_compact = 0
+
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        conn = self._connect()
+        try:
+            # auto_vacuum only takes effect on a new database; harmless otherwise.
+            conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            try:
+                conn.executescript(_FTS_SCHEMA)
+                self.has_fts = True
+            except sqlite3.OperationalError as e:
+                log.warning(f"SQLite FTS5 unavailable, history search falls back to LIKE: {e}")
+            conn.commit()
+            stored = dict(conn.execute("SELECT key, value FROM settings"))
+            self.max_entries = int(stored.get("max_entries", self.max_entries))
+            self.max_age_days = int(stored.get("max_age_days", self.max_age_days))
+        finally:
+            conn.close()
+
+        self._writer = threading.Thread(target=self._write_loop, name="s2t-history", daemon=True)
+        self._writer.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=5.0)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def add(self, entry: dict):
+        """Queue an entry for writing; never blocks."""
+        if self.max_entries > 0:
+            self._queue.put(entry)
+
+    def set_retention(self, max_entries: int, max_age_days: int):
+        """
+        Change and store the limits (0 entries turns history off and deletes stored entries).
+
+        Storing and deleting happen on the writer thread; this never blocks.
+        """
+        self.max_entries = max(0, int(max_entries))
+        self.max_age_days = max(0, int(max_age_days))
+        self._queue.put(_RETENTION_CHANGED)
+
+    def close(self):
+        """Flush pending entries and stop the writer thread."""
+        if self._writer.is_alive():
+            self._queue.put(None)
+            self._writer.join(timeout=5.0)
+
+    def _write_loop(self):
+        conn = self._connect()
+        try:
+            while True:
+                entry = self._queue.get()
+                if entry is None:
+                    return
+                retention_changed = entry is _RETENTION_CHANGED
+                batch = [] if retention_changed else [entry]
+                deadline = time.monotonic() + BATCH_WAIT
+                stop = False
+                while not retention_changed and len(batch) < BATCH_SIZE:
+                    try:
+                        entry = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                    except queue.Empty:
+                        break
+                    if entry is None:
+                        stop = True
+                        break
+                    if entry is _RETENTION_CHANGED:
+                        retention_changed = True
+                        break
+                    batch.append(entry)
+
+                try:
+                    self._write_batch(conn, batch)
+                    if retention_changed:
+                        self._store_retention(conn)
+                    self._apply_retention(conn)
+                except sqlite3.Error as e:
+                    log.error(f"Failed to write transcription history: {e}")
+                    conn.rollback()
+
+                if stop:
+                    return
+        finally:
+            conn.close()
+
+    def _write_batch(self, conn, batch):
+        with conn:
+            conn.executemany(
+                "INSERT INTO transcriptions (recording_id, created_at, completed_at, model, language, "
+                "record_seconds, transcribe_seconds, decoding, rtf, text) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        e["recording_id"],
+                        e["created_at"],
+                        e["completed_at"],
+                        e.get("model", ""),
+                        e.get("language") or "",
+                        e.get("record_seconds", 0.0),
+                        e.get("transcribe_seconds", 0.0),
+                        e.get("decoding", ""),
+                        e.get("rtf", 0.0),
+                        e["text"],
+                    )
+                    for e in batch
+                ],
+            )
+
+    def _store_retention(self, conn):
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)",
+                [("max_entries", str(self.max_entries)), ("max_age_days", str(self.max_age_days))],
+            )
+
+    def _apply_retention(self, conn):
+        deleted = 0
+        with conn:
+            if self.max_entries == 0:
+                deleted += conn.execute("DELETE FROM transcriptions").rowcount
+            else:
+                deleted += conn.execute(
+                    "DELETE FROM transcriptions WHERE id <= "
+                    "(SELECT id FROM transcriptions ORDER BY id DESC LIMIT 1 OFFSET ?)",
+                    (self.max_entries,),
+                ).rowcount
+            if self.max_age_days > 0:
+                cutoff = time.time() - self.max_age_days * 86400
+                deleted += conn.execute(
+                    "DELETE FROM transcriptions WHERE created_at < ?", (cutoff,)
+                ).rowcount
+
+        self._deleted_since_compact += max(0, deleted)
+        # With history off, also reclaim the pages still holding the deleted text.
+        off = self.max_entries == 0 and deleted > 0
+        if off or self._deleted_since_compact >= COMPACT_AFTER_DELETES:
+            self._compact(conn)
+
+    def _compact(self, conn):
+        if self.has_fts:
+            with conn:
+                conn.execute("INSERT INTO transcriptions_fts (transcriptions_fts) VALUES ('optimize')")
+        conn.execute("PRAGMA incremental_vacuum")
+        self._deleted_since_compact = 0
+        log.info("Transcription history compacted")
+
+    def page(self, before_id: int = 0, limit: int = 50) -> list:
+        """Newest-first page of entries with id < before_id (0 starts from the newest)."""
+        limit = min(max(1, limit), 500)
+        conn = self._connect()
+        try:
+            if before_id > 0:
+                rows = conn.execute(
+                    f"SELECT {_COLUMNS} FROM transcriptions WHERE id < ? ORDER BY id DESC LIMIT ?",
+                    (before_id, limit),
+                )
+            else:
+                rows = conn.execute(
+                    f"SELECT {_COLUMNS} FROM transcriptions ORDER BY id DESC LIMIT ?", (limit,)
+                )
+            return [list(row) for row in rows]
+        finally:
+            conn.close()
+
+    def search(self, query: str, limit: int = 50) -> list:
+        """Entries matching every word of query, best match first."""
+        limit = min(max(1, limit), 500)
+        match = _fts_query(query)
+        if not match:
+            return []
+        conn = self._connect()
+        try:
+            if self.has_fts:
+                columns = ", ".join(f"t.{c.strip()}" for c in _COLUMNS.split(","))
+                rows = conn.execute(
+                    f"SELECT {columns} FROM transcriptions_fts f "
+                    "JOIN transcriptions t ON t.id = f.rowid "
+                    "WHERE transcriptions_fts MATCH ? ORDER BY bm25(transcriptions_fts), t.id DESC LIMIT ?",
+                    (match, limit),
+                )
+            else:
+                terms = query.split()
+                where = " AND ".join("text LIKE ?" for _ in terms)
+                rows = conn.execute(
+                    f"SELECT {_COLUMNS} FROM transcriptions WHERE {where} ORDER BY id DESC LIMIT ?",
+                    [f"%{t}%" for t in terms] + [limit],
+                )
+            return [list(row) for row in rows]
+        finally:
+            conn.close()
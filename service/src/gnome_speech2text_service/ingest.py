@@ -0,0 +1,148 @@
+"""
+Raw PCM submitted by other processes over a Unix file descriptor.
+
+Local tools (a PipeWire filter, a meeting recorder, ...) pass a pipe or memfd to
+TranscribeStream together with a format descriptor:
+
+    <sample format>[:<rate>[:<channels>]]     e.g. "s16le", "f32le:48000:2"
+
+Supported sample formats are s16le and f32le (interleaved). Audio is converted
+chunk by chunk to the 16 kHz mono int16 PCM the rest of the service works with, so
+only a few filter lengths are buffered in the original format and no temporary file is
+written. Resampling is band-limited (torchaudio's windowed-sinc filter), so content above
+8 kHz is removed instead of being folded into the speech band.
+"""
+
+import math
+
+import numpy as np
+import torch
+import torchaudio.functional as AF
+
+SAMPLE_RATE = 16000
+
+# torchaudio.functional.resample defaults; they also set how much context a block needs.
+LOWPASS_FILTER_WIDTH = 6
+ROLLOFF = 0.99
+
+_SAMPLE_FORMATS = {
+    "s16le": ("<i2", 32768.0),
+    "f32le": ("<f4", 1.0),
+}
+
+
+class PcmFormat:
+    def __init__(self, sample_format: str, rate: int, channels: int):
+        self.sample_format = sample_format
+        self.rate = rate
+        self.channels = channels
+        self.dtype, self.scale = _SAMPLE_FORMATS[sample_format]
+        self.frame_bytes = np.dtype(self.dtype).itemsize * channels
+
+    def __repr__(self):
+        return f"{self.sample_format}:{self.rate}:{self.channels}"
+
+
+def parse_format(descriptor: str) -> PcmFormat:
+    """Parse a format descriptor; raises ValueError for anything unsupported."""
+    parts = [p.strip() for p in (descriptor or "s16le").lower().split(":")]
+    if len(parts) > 3:
+        raise ValueError(f"Invalid audio format: {descriptor}")
+    sample_format = parts[0] or "s16le"
+    if sample_format not in _SAMPLE_FORMATS:
+        raise ValueError(
+            f"Unsupported sample format: {sample_format}. Allowed: {', '.join(_SAMPLE_FORMATS)}"
+        )
+    try:
+        rate = int(parts[1]) if len(parts) > 1 and parts[1] else SAMPLE_RATE
+        channels = int(parts[2]) if len(parts) > 2 and parts[2] else 1
+    except ValueError:
+        raise ValueError(f"Invalid audio format: {descriptor}") from None
+    if not 8000 <= rate <= 192000:
+        raise ValueError(f"Unsupported sample rate: {rate}")
+    if not 1 <= channels <= 8:
+        raise ValueError(f"Unsupported channel count: {channels}")
+    return PcmFormat(sample_format, rate, channels)
+
+
+class PcmConverter:
+    """
+    Convert a stream of PCM chunks to 16 kHz mono int16 bytes.
+
+    The input is resampled in blocks of whole resampling periods (rate / gcd(rate, 16000)
+    samples), each with enough input on both sides for the filter, so the output is the
+    same as resampling the whole stream at once. Call flush() at the end of the stream.
+    """
+
+    def __init__(self, pcm_format: PcmFormat):
+        self.format = pcm_format
+        self._carry = b""  # partial frame left over from the previous chunk
+        divisor = math.gcd(pcm_format.rate, SAMPLE_RATE)
+        self._orig = pcm_format.rate // divisor
+        self._new = SAMPLE_RATE // divisor
+        # Filter half-width in input samples, rounded up to whole periods.
+        width = math.ceil(LOWPASS_FILTER_WIDTH * self._orig / (min(self._orig, self._new) * ROLLOFF))
+        self._context = math.ceil(width / self._orig) * self._orig
+        # Mono input not yet resampled, preceded by _context samples of history (zeros at
+        # the start, as torchaudio pads).
+        self._pending = np.zeros(self._context, dtype=np.float32)
+
+    def feed(self, data: bytes) -> bytes:
+        fmt = self.format
+        data = self._carry + data
+        usable = len(data) - len(data) % fmt.frame_bytes
+        self._carry = data[usable:]
+        if not usable:
+            return b""
+
+        samples = np.frombuffer(data[:usable], dtype=fmt.dtype).astype(np.float32) / fmt.scale
+        if fmt.channels > 1:
+            samples = samples.reshape(-1, fmt.channels).mean(axis=1)
+        if fmt.rate != SAMPLE_RATE:
+            samples = self._resample(samples)
+        return _to_pcm(samples)
+
+    def flush(self) -> bytes:
+        """Resample the input still held back for filter context; returns the last bytes."""
+        if self.format.rate == SAMPLE_RATE:
+            return b""
+        remaining = self._pending.size - self._context
+        if remaining <= 0:
+            return b""
+        block = math.ceil(remaining / self._orig) * self._orig
+        padded = np.zeros(block + 2 * self._context, dtype=np.float32)
+        padded[: self._pending.size] = self._pending
+        self._pending = np.zeros(self._context, dtype=np.float32)
+        # Trailing zeros only pad the last period; drop the outputs they alone produce.
+        return _to_pcm(self._resample_block(padded, block)[: math.ceil(remaining * self._new / self._orig)])
+
+    def _resample(self, samples: np.ndarray) -> np.ndarray:
+        """Resample every whole period that has filter context on both sides; keep the rest."""
+        self._pending = np.concatenate([self._pending, samples])
+        block = (self._pending.size - 2 * self._context) // self._orig * self._orig
+        if block <= 0:
+            return np.zeros(0, dtype=np.float32)
+        out = self._resample_block(self._pending[: block + 2 * self._context], block)
+        self._pending = self._pending[block:]
+        return out
+
+    def _resample_block(self, segment: np.ndarray, block: int) -> np.ndarray:
+        """Outputs for segment[_context:_context + block]; the context outputs are dropped."""
+        out = AF.resample(
+            torch.from_numpy(np.ascontiguousarray(segment)),
+            self.format.rate,
+            SAMPLE_RATE,
+            lowpass_filter_width=LOWPASS_FILTER_WIDTH,
+            rolloff=ROLLOFF,
+        ).numpy()
+        first = self._context // self._orig * self._new
+        return out[first : first + block // self._orig * self._new]
+
+
+def _to_pcm(samples: np.ndarray) -> bytes:
+    return (np.clip(samples, -1.0, 1.0) * 32767.0).astype("<i2").tobytes()
+
+
+def pcm_to_float(pcm: bytes) -> np.ndarray:
+    """16 kHz mono int16 PCM as the float32 waveform whisper.transcribe() accepts."""
+    return np.frombuffer(pcm, dtype="<i2").astype(np.float32) / 32768.0
@@ -0,0 +1,153 @@
+"""
+Non-blocking logging for the Speech2Text service.
+
+Log calls on the recording/transcription threads only enqueue a record; a background
+listener thread writes it to syslog (journald) and, optionally, the console. Repeated
+messages from the same call site are rate-limited.
+"""
+
+import logging
+import logging.handlers
+import queue
+import sys
+import syslog
+import threading
+import time
+
+LOGGER_NAME = "speech2text"
+SYSLOG_IDENT = "speech2text-extension-service"
+
+# Bounded so a stuck writer can never grow memory without limit; overflow is dropped and counted.
+QUEUE_SIZE = 10000
+
+# At most RATE_LIMIT_BURST records per call site within RATE_LIMIT_INTERVAL seconds.
+RATE_LIMIT_BURST = 10
+RATE_LIMIT_INTERVAL = 10.0
+
+_SYSLOG_PRIORITIES = {
+    logging.DEBUG: syslog.LOG_DEBUG,
+    logging.INFO: syslog.LOG_INFO,
+    logging.WARNING: syslog.LOG_WARNING,
+    logging.ERROR: syslog.LOG_ERR,
+    logging.CRITICAL: syslog.LOG_CRIT,
+}
+
+_listener = None
+_queue_handler = None
+
+
+class _SyslogHandler(logging.Handler):
+    """Write records through the syslog module so journald keeps the same identifier."""
+
+    def emit(self, record):
+        try:
+            priority = _SYSLOG_PRIORITIES.get(record.levelno, syslog.LOG_INFO)
+            syslog.syslog(priority, self.format(record))
+        except Exception:
+            self.handleError(record)
+
+
+class _RateLimitFilter(logging.Filter):
+    """Drop records from a call site that logs more than RATE_LIMIT_BURST times per interval."""
+
+    def __init__(self):
+        super().__init__()
+        self._lock = threading.Lock()
+        self._sites = {}  # (pathname, lineno) -> [window_start, count, suppressed]
+
+    def filter(self, record):
+        key = (record.pathname, record.lineno)
+        now = time.monotonic()
+        with self._lock:
+            site = self._sites.get(key)
+            if site is None or now - site[0] >= RATE_LIMIT_INTERVAL:
+                suppressed = site[2] if site else 0
+                self._sites[key] = [now, 1, 0]
+                if suppressed:
+                    record.msg = f"{record.msg} (suppressed {suppressed} similar messages)"
+                return True
+            site[1] += 1
+            if site[1] <= RATE_LIMIT_BURST:
+                return True
+            site[2] += 1
+            return False
+
+
+class _TimedQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that never blocks and tracks its own per-record cost."""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.records = 0
+        self.dropped = 0
+        self.emit_ns = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def handle(self, record):
+        started = time.perf_counter_ns()
+        emitted = super().handle(record)
+        self.emit_ns += time.perf_counter_ns() - started
+        self.records += 1
+        return emitted
+
+
+def setup_logging(debug: bool = False) -> logging.Logger:
+    """Configure the service logger; safe to call more than once."""
+    global _listener, _queue_handler
+
+    logger = logging.getLogger(LOGGER_NAME)
+    logger.setLevel(logging.DEBUG if debug else logging.INFO)
+    logger.propagate = False
+
+    if _listener is not None:
+        return logger
+
+    syslog.openlog(SYSLOG_IDENT, syslog.LOG_PID, syslog.LOG_USER)
+
+    syslog_handler = _SyslogHandler()
+    syslog_handler.setFormatter(logging.Formatter("%(message)s"))
+
+    console_handler = logging.StreamHandler(sys.stdout)
+    console_handler.setLevel(logging.DEBUG if debug else logging.WARNING)
+    console_handler.setFormatter(logging.Formatter("%(levelname)s: %(message)s"))
+
+    log_queue = queue.Queue(QUEUE_SIZE)
+    _queue_handler = _TimedQueueHandler(log_queue)
+    _queue_handler.addFilter(_RateLimitFilter())
+    logger.addHandler(_queue_handler)
+
+    _listener = logging.handlers.QueueListener(
+        log_queue, syslog_handler, console_handler, respect_handler_level=True
+    )
+    _listener.start()
+    return logger
+
+
+def shutdown_logging():
+    """Flush queued records and stop the background writer."""
+    global _listener, _queue_handler
+
+    if _listener is None:
+        return
+    _listener.stop()
+    logging.getLogger(LOGGER_NAME).removeHandler(_queue_handler)
+    _listener = None
+    _queue_handler = None
+
+
+def get_logger() -> logging.Logger:
+    return logging.getLogger(LOGGER_NAME)
+
+
+def log_stats() -> dict:
+    """Counters for the enqueue path: records, dropped records and mean cost per record."""
+    handler = _queue_handler
+    if handler is None:
+        return {"records": 0, "dropped": 0, "avg_emit_us": 0.0}
+    avg_us = handler.emit_ns / handler.records / 1000.0 if handler.records else 0.0
+    return {"records": handler.records, "dropped": handler.dropped, "avg_emit_us": avg_us}
@@ -0,0 +1,220 @@
+"""
+Text post-processing for transcriptions: replacements, spoken punctuation and snippets.
+
+All rules are compiled into a single Aho-Corasick automaton, so applying them costs one
+pass over the text regardless of how many rules there are. Rules come from a JSON file
+that is recompiled whenever its mtime changes:
+
+    {
+        "spoken_punctuation": true,
+        "replacements": {"gnome shell": "GNOME Shell"},
+        "snippets": {"insert signature": "Best regards,\\nKaveh"}
+    }
+
+Spoken punctuation is opt-in (off when the file or key is missing). Phrases match
+case-insensitively on word boundaries; the longest match wins.
+"""
+
+import json
+import os
+import threading
+
+from .logger import get_logger
+
+log = get_logger()
+
+# Spoken punctuation that attaches to the preceding word ("hello comma" -> "hello,").
+_ATTACHED_PUNCTUATION = {
+    "comma": ",",
+    "period": ".",
+    "full stop": ".",
+    "question mark": "?",
+    "exclamation mark": "!",
+    "exclamation point": "!",
+    "colon": ":",
+    "semicolon": ";",
+}
+
+# Spoken line breaks; surrounding spaces are removed.
+_LINE_BREAKS = {
+    "new line": "\n",
+    "newline": "\n",
+    "new paragraph": "\n\n",
+}
+
+# Punctuation Whisper tends to add around spoken commands ("Hello, comma, world.").
+_WHISPER_PUNCTUATION = ".,!?;:"
+
+_KIND_REPLACE = 0
+_KIND_ATTACH = 1
+_KIND_BREAK = 2
+
+
+def default_rules_path() -> str:
+    config_home = os.environ.get("XDG_CONFIG_HOME") or os.path.expanduser("~/.config")
+    return os.path.join(config_home, "speech2text-extension-service", "rules.json")
+
+
+class _Automaton:
+    """Aho-Corasick automaton over lowercase phrases."""
+
+    def __init__(self, rules: dict):
+        # rules: phrase -> (replacement, kind)
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [None]  # longest phrase ending exactly at this node
+        self._dict_link = [0]  # nearest proper suffix node with an output
+        self.rules = rules
+
+        for phrase in rules:
+            node = 0
+            for ch in phrase:
+                nxt = self._goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[node][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append(None)
+                    self._dict_link.append(0)
+                node = nxt
+            self._out[node] = phrase
+
+        # Breadth-first construction of failure and output links.
+        order = list(self._goto[0].values())
+        head = 0
+        while head < len(order):
+            node = order[head]
+            head += 1
+            for ch, child in self._goto[node].items():
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(ch, 0)
+                self._fail[child] = target if target != child else 0
+                fail_node = self._fail[child]
+                self._dict_link[child] = (
+                    fail_node if self._out[fail_node] is not None else self._dict_link[fail_node]
+                )
+                order.append(child)
+
+    def matches(self, text: str):
+        """Yield (start, end, phrase) for every rule occurrence in text (already lowercased)."""
+        node = 0
+        for i, ch in enumerate(text):
+            while node and ch not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(ch, 0)
+            hit = node if self._out[node] is not None else self._dict_link[node]
+            while hit:
+                phrase = self._out[hit]
+                yield i + 1 - len(phrase), i + 1, phrase
+                hit = self._dict_link[hit]
+
+
+def _on_word_boundary(text: str, start: int, end: int) -> bool:
+    return (start == 0 or not text[start - 1].isalnum()) and (
+        end == len(text) or not text[end].isalnum()
+    )
+
+
+class TextPostProcessor:
+    """Apply compiled rules to transcribed text, reloading the rule file when it changes."""
+
+    def __init__(self, path: str = None):
+        self.path = path or default_rules_path()
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._automaton = None
+
+    def _rules_from_config(self, config: dict) -> dict:
+        rules = {}
+        # Opt-in: words like "period" or "colon" are also ordinary words in dictation.
+        if config.get("spoken_punctuation", False):
+            rules.update({p: (r, _KIND_ATTACH) for p, r in _ATTACHED_PUNCTUATION.items()})
+            rules.update({p: (r, _KIND_BREAK) for p, r in _LINE_BREAKS.items()})
+        # Snippets and replacements override built-ins with the same phrase.
+        for section in ("snippets", "replacements"):
+            for phrase, replacement in (config.get(section) or {}).items():
+                phrase = " ".join(str(phrase).lower().split())
+                if phrase:
+                    rules[phrase] = (str(replacement), _KIND_REPLACE)
+        return rules
+
+    def _reload_if_changed(self):
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError:
+            mtime = None
+
+        if mtime == self._mtime and self._automaton is not None:
+            return
+
+        config = {}
+        if mtime is not None:
+            try:
+                with open(self.path, encoding="utf-8") as f:
+                    config = json.load(f)
+                if not isinstance(config, dict):
+                    raise ValueError("top level must be an object")
+            except (OSError, ValueError) as e:
+                log.error(f"Invalid post-processing rules in {self.path}, keeping previous rules: {e}")
+                if self._automaton is not None:
+                    self._mtime = mtime
+                    return
+                config = {}
+
+        rules = self._rules_from_config(config)
+        self._automaton = _Automaton(rules)
+        self._mtime = mtime
+        log.info(f"Compiled {len(rules)} post-processing rules")
+
+    def process(self, text: str) -> str:
+        if not text:
+            return text
+
+        with self._lock:
+            self._reload_if_changed()
+            automaton = self._automaton
+
+        lowered = text.lower()
+        if len(lowered) != len(text):
+            # A few characters change length when lowercased; match case-sensitively instead.
+            lowered = text
+        candidates = [
+            (start, end, phrase)
+            for start, end, phrase in automaton.matches(lowered)
+            if _on_word_boundary(lowered, start, end)
+        ]
+        if not candidates:
+            return text
+
+        # Leftmost-longest, non-overlapping.
+        candidates.sort(key=lambda m: (m[0], m[0] - m[1]))
+        out = []
+        pos = 0
+        for start, end, phrase in candidates:
+            if start < pos:
+                continue
+            replacement, kind = automaton.rules[phrase]
+            before = text[pos:start]
+            if kind == _KIND_ATTACH:
+                before = before.rstrip().rstrip(_WHISPER_PUNCTUATION)
+                if not before and out:
+                    out[-1] = out[-1].rstrip().rstrip(_WHISPER_PUNCTUATION)
+            elif kind == _KIND_BREAK:
+                before = before.rstrip()
+                if not before and out:
+                    out[-1] = out[-1].rstrip()
+            out.append(before)
+            out.append(replacement)
+            pos = end
+            if kind != _KIND_REPLACE:
+                # Drop the punctuation Whisper put after the spoken command.
+                while pos < len(text) and text[pos] in _WHISPER_PUNCTUATION:
+                    pos += 1
+                if kind == _KIND_BREAK:
+                    while pos < len(text) and text[pos] == " ":
+                        pos += 1
+        out.append(text[pos:])
+        return "".join(out)
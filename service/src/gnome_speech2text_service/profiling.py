@@ -0,0 +1,304 @@
+"""
+Per-recording profiling for the record -> transcribe -> type pipeline.
+
+Enabled with --profile (or --debug). Each recording gets a plain-text report under
+$XDG_STATE_HOME/speech2text-extension-service/profiles containing per-stage wall time,
+tracemalloc peak/net allocations and top allocation sites, torch operator timings for the
+transcribe stage, and a cProfile of the recording thread. Reports can be listed and fetched
+over D-Bus so they can be attached to bug reports.
+
+tracemalloc is process-wide, so allocation figures for overlapping stages (e.g. streamed
+typing during transcription) include each other. Torch tensor storage is not seen by
+tracemalloc; the torch operator table reports it instead.
+"""
+
+import cProfile
+import io
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+
+from .logger import get_logger
+
+log = get_logger()
+
+# Reports kept on disk; older ones are removed when a new recording starts.
+MAX_REPORTS = 50
+
+# How long a finished transcription waits for its text to be typed before the report is written.
+OUTPUT_WAIT = 30.0
+
+_REPORT_SUFFIX = ".txt"
+
+
+def default_profile_dir() -> str:
+    state_home = os.environ.get("XDG_STATE_HOME") or os.path.expanduser("~/.local/state")
+    return os.path.join(state_home, "speech2text-extension-service", "profiles")
+
+
+def _snapshot():
+    """tracemalloc snapshot without the allocations made by profiling itself."""
+    return tracemalloc.take_snapshot().filter_traces(
+        (
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+        )
+    )
+
+
+class _NullProfile:
+    """Stand-in used when profiling is off; every hook is a no-op."""
+
+    def begin_stage(self, name: str, torch_ops: bool = False):
+        pass
+
+    def end_stage(self, name: str):
+        pass
+
+    def complete(self, output_pending: bool = False):
+        pass
+
+
+NULL_PROFILE = _NullProfile()
+
+
+class RecordingProfile:
+    """Profiling data collected for one recording."""
+
+    def __init__(self, profiler: "Profiler", recording_id: str):
+        self._profiler = profiler
+        self.recording_id = recording_id
+        self.created_at = time.time()
+        self._lock = threading.Lock()
+        self._stages = {}  # name -> dict of measurements, in start order
+        self._open = {}  # name -> (perf_counter start, tracemalloc snapshot)
+        self._torch = None
+        self._torch_table = None
+        self._written = False
+        self._timer = None
+
+        self._cprofile = cProfile.Profile()
+        try:
+            self._cprofile.enable()
+        except ValueError as e:
+            # Another recording (or an external tool) already owns the profiler hook.
+            log.debug("cProfile unavailable for %s: %s", recording_id, e)
+            self._cprofile = None
+
+    def begin_stage(self, name: str, torch_ops: bool = False):
+        with self._lock:
+            if self._written or name in self._open:
+                return
+            snapshot = _snapshot()
+            if hasattr(tracemalloc, "reset_peak"):  # Python 3.9+
+                tracemalloc.reset_peak()
+            self._open[name] = (time.perf_counter(), snapshot)
+            self._stages[name] = {}
+            if torch_ops and self._torch is None:
+                self._torch = self._start_torch_profiler()
+
+    def end_stage(self, name: str):
+        with self._lock:
+            self._end_stage_locked(name)
+            write_now = self._timer is not None and name == "type"
+        if write_now:
+            self._write()
+
+    def _end_stage_locked(self, name: str):
+        started = self._open.pop(name, None)
+        if started is None:
+            return
+        started_at, before = started
+        seconds = time.perf_counter() - started_at
+        _, peak = tracemalloc.get_traced_memory()
+        diff = _snapshot().compare_to(before, "lineno")
+        self._stages[name] = {
+            "seconds": seconds,
+            "peak_kib": peak / 1024.0,
+            "net_kib": sum(stat.size_diff for stat in diff) / 1024.0,
+            "top": [str(stat) for stat in diff[:10] if stat.size_diff > 0],
+        }
+        if self._torch is not None and name == "transcribe":
+            self._torch_table = self._stop_torch_profiler(self._torch)
+            self._torch = None
+
+    @staticmethod
+    def _start_torch_profiler():
+        try:
+            import torch
+
+            prof = torch.profiler.profile(activities=[torch.profiler.ProfilerActivity.CPU])
+            prof.__enter__()
+            return prof
+        except Exception as e:
+            log.debug("torch profiler unavailable: %s", e)
+            return None
+
+    @staticmethod
+    def _stop_torch_profiler(prof) -> str:
+        try:
+            prof.__exit__(None, None, None)
+            return prof.key_averages().table(sort_by="self_cpu_time_total", row_limit=25)
+        except Exception as e:
+            return f"torch profiler failed: {e}"
+
+    def complete(self, output_pending: bool = False):
+        """
+        Stop collecting for the recording thread.
+
+        The report is written right away, or, when the text still has to be typed, once the
+        "type" stage ends (at most OUTPUT_WAIT seconds later).
+        """
+        if self._cprofile is not None:
+            self._cprofile.disable()
+        if not output_pending:
+            self._write()
+            return
+        with self._lock:
+            if self._written:
+                return
+            typed = "seconds" in self._stages.get("type", {})
+            if not typed:
+                self._timer = threading.Timer(OUTPUT_WAIT, self._write)
+                self._timer.daemon = True
+                self._timer.start()
+        if typed:
+            self._write()
+        else:
+            self._profiler._set_awaiting_output(self)
+
+    def _write(self):
+        with self._lock:
+            if self._written:
+                return
+            self._written = True
+            if self._timer is not None:
+                self._timer.cancel()
+            for name in list(self._open):
+                self._end_stage_locked(name)
+            if self._torch is not None:
+                self._torch_table = self._stop_torch_profiler(self._torch)
+                self._torch = None
+            report = self._render()
+        self._profiler._save(self, report)
+
+    def _render(self) -> str:
+        out = io.StringIO()
+        started = datetime.fromtimestamp(self.created_at).isoformat(timespec="seconds")
+        out.write(f"Speech2Text profile for recording {self.recording_id} ({started})\n\n")
+
+        out.write(f"{'stage':<12}{'seconds':>10}{'peak_kib':>12}{'net_kib':>12}\n")
+        for name, stage in self._stages.items():
+            if "seconds" in stage:
+                out.write(
+                    f"{name:<12}{stage['seconds']:>10.3f}"
+                    f"{stage['peak_kib']:>12.1f}{stage['net_kib']:>12.1f}\n"
+                )
+        for name, stage in self._stages.items():
+            if stage.get("top"):
+                out.write(f"\nTop allocations during {name}:\n")
+                out.write("".join(f"  {line}\n" for line in stage["top"]))
+
+        if self._torch_table:
+            out.write("\nTorch operators (transcribe):\n")
+            out.write(self._torch_table)
+            out.write("\n")
+
+        if self._cprofile is not None:
+            stats_out = io.StringIO()
+            try:
+                stats = pstats.Stats(self._cprofile, stream=stats_out)
+                stats.sort_stats("cumulative").print_stats(40)
+            except TypeError:
+                stats_out.write("(no samples)\n")
+            out.write("\ncProfile (recording thread, cumulative):\n")
+            out.write(stats_out.getvalue())
+        return out.getvalue()
+
+
+class Profiler:
+    """Creates per-recording profiles and manages the reports on disk."""
+
+    def __init__(self, enabled: bool = False, directory: str = None):
+        self.enabled = enabled
+        self.directory = directory or default_profile_dir()
+        self._awaiting = None
+        self._lock = threading.Lock()
+        if enabled:
+            os.makedirs(self.directory, exist_ok=True)
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            log.info(f"Profiling enabled, reports are written to {self.directory}")
+
+    def begin(self, recording_id: str):
+        """Start profiling a recording; returns a no-op profile when profiling is off."""
+        if not self.enabled:
+            return NULL_PROFILE
+        self._prune()
+        return RecordingProfile(self, recording_id)
+
+    def awaiting_output(self):
+        """The most recent profile still waiting for its text to be typed, if any."""
+        with self._lock:
+            profile = self._awaiting
+        if profile is None or profile._written:
+            return NULL_PROFILE
+        return profile
+
+    def _set_awaiting_output(self, profile: RecordingProfile):
+        with self._lock:
+            self._awaiting = profile
+
+    def _report_path(self, profile: RecordingProfile) -> str:
+        stamp = datetime.fromtimestamp(profile.created_at).strftime("%Y%m%dT%H%M%S")
+        return os.path.join(self.directory, f"{stamp}-{profile.recording_id}{_REPORT_SUFFIX}")
+
+    def _save(self, profile: RecordingProfile, report: str):
+        path = self._report_path(profile)
+        try:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(report)
+            log.info(f"Profile for recording {profile.recording_id} written to {path}")
+        except OSError as e:
+            log.error(f"Failed to write profile report {path}: {e}")
+
+    def _reports(self) -> list:
+        """(recording_id, path) for every report, oldest first."""
+        try:
+            names = sorted(n for n in os.listdir(self.directory) if n.endswith(_REPORT_SUFFIX))
+        except OSError:
+            return []
+        return [
+            (name[len("YYYYmmddTHHMMSS-") : -len(_REPORT_SUFFIX)], os.path.join(self.directory, name))
+            for name in names
+        ]
+
+    def _prune(self):
+        reports = self._reports()
+        for _, path in reports[: max(0, len(reports) - MAX_REPORTS + 1)]:
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+
+    def list(self) -> list:
+        """[recording_id, written_at, size_bytes] for every report, newest first."""
+        entries = []
+        for recording_id, path in reversed(self._reports()):
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            entries.append([recording_id, st.st_mtime, st.st_size])
+        return entries
+
+    def read(self, recording_id: str) -> str:
+        """Report text for recording_id, or "" if there is none."""
+        for report_id, path in self._reports():
+            if report_id == recording_id:
+                with open(path, encoding="utf-8") as f:
+                    return f.read()
+        return ""
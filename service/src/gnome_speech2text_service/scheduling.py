@@ -0,0 +1,253 @@
+"""
+CPU scheduling for the inference path.
+
+Whisper inference can saturate every core for seconds at a time, which on small laptops
+makes GNOME Shell animations stutter. SchedulingPolicy lowers the priority of the thread
+running a transcription and the inference threads it starts (nice level, optionally
+SCHED_BATCH) and keeps some CPUs free for the compositor via affinity. The D-Bus event
+loop, typing, clipboard and writer threads are left alone so the service stays responsive
+while transcribing.
+
+Optionally the whole service process, event loop and typing included, is moved into a
+systemd user scope with a low CPU weight. Cgroups are per process, so this cannot be limited
+to inference; turning the option off again restores the default weight on that scope.
+"""
+
+import asyncio
+import os
+import subprocess
+import threading
+import time
+from collections import deque
+
+from .logger import get_logger
+
+log = get_logger()
+
+SCOPE_UNIT = "speech2text-extension-service-inference.scope"
+# CPUWeight of the scope while the option is on, and systemd's default to restore.
+SCOPE_CPU_WEIGHT = 20
+DEFAULT_CPU_WEIGHT = 100
+
+
+class SchedulingPolicy:
+    """How inference threads are scheduled."""
+
+    def __init__(self, nice: int = 0, batch: bool = False, reserved_cpus: int = 0, scope: bool = False):
+        self.nice = min(max(0, int(nice)), 19)
+        self.batch = bool(batch)
+        self.reserved_cpus = max(0, int(reserved_cpus))
+        self.scope = bool(scope)
+
+    def __repr__(self):
+        return (
+            f"nice={self.nice},batch={self.batch},"
+            f"reserved_cpus={self.reserved_cpus},scope={self.scope}"
+        )
+
+    def allowed_cpus(self) -> set:
+        """CPUs inference may use: all available ones minus the lowest reserved_cpus (keeps >= 1)."""
+        try:
+            available = sorted(os.sched_getaffinity(0))
+        except (AttributeError, OSError):
+            available = list(range(os.cpu_count() or 1))
+        reserved = min(self.reserved_cpus, len(available) - 1)
+        return set(available[reserved:])
+
+    def inference_threads(self) -> int:
+        """Torch intra-op thread count matching the allowed CPUs (capped at 4 as before)."""
+        return max(1, min(4, len(self.allowed_cpus())))
+
+
+def _default_reserved_cpus() -> int:
+    return 1 if (os.cpu_count() or 1) > 2 else 0
+
+
+# Presets, from least to most restrictive (nice can only be raised without privileges).
+PRESETS = {
+    "normal": SchedulingPolicy(),
+    "desktop": SchedulingPolicy(nice=10, batch=True, reserved_cpus=_default_reserved_cpus()),
+    "background": SchedulingPolicy(
+        nice=19, batch=True, reserved_cpus=_default_reserved_cpus(), scope=True
+    ),
+}
+
+
+def apply_to_current_thread(policy: SchedulingPolicy):
+    """
+    Apply policy to the calling (transcribing) thread.
+
+    Nice level, scheduler class and affinity are per thread on Linux and inherited by
+    threads created afterwards, so torch/OpenMP pool threads started by this thread follow
+    it. Call before the thread loads or runs the model.
+    """
+    tid = threading.get_native_id()
+    try:
+        if os.getpriority(os.PRIO_PROCESS, tid) != policy.nice:
+            os.setpriority(os.PRIO_PROCESS, tid, policy.nice)
+    except PermissionError:
+        # Lowering nice again needs CAP_SYS_NICE; keep the stricter setting.
+        pass
+    try:
+        sched = os.SCHED_BATCH if policy.batch else os.SCHED_OTHER
+        if os.sched_getscheduler(tid) != sched:
+            os.sched_setscheduler(tid, sched, os.sched_param(0))
+    except (AttributeError, OSError):
+        pass
+    try:
+        os.sched_setaffinity(tid, policy.allowed_cpus())
+    except (AttributeError, OSError):
+        pass
+
+
+def move_to_scope(cpu_weight: int = SCOPE_CPU_WEIGHT) -> bool:
+    """Move the whole service process into a transient systemd user scope with cpu_weight."""
+    cmd = [
+        "busctl",
+        "--user",
+        "call",
+        "org.freedesktop.systemd1",
+        "/org/freedesktop/systemd1",
+        "org.freedesktop.systemd1.Manager",
+        "StartTransientUnit",
+        "ssa(sv)a(sa(sv))",
+        SCOPE_UNIT,
+        "replace",
+        "2",
+        "PIDs",
+        "au",
+        "1",
+        str(os.getpid()),
+        "CPUWeight",
+        "t",
+        str(cpu_weight),
+        "0",
+    ]
+    try:
+        subprocess.run(cmd, capture_output=True, check=True, timeout=5)
+        log.info(f"Moved service into systemd scope {SCOPE_UNIT} (CPUWeight={cpu_weight})")
+        return True
+    except (FileNotFoundError, subprocess.CalledProcessError, subprocess.TimeoutExpired) as e:
+        log.warning(f"Could not create systemd scope for inference: {e}")
+        return False
+
+
+def set_scope_weight(cpu_weight: int) -> bool:
+    """Change the CPUWeight of the scope created by move_to_scope()."""
+    cmd = [
+        "busctl",
+        "--user",
+        "call",
+        "org.freedesktop.systemd1",
+        "/org/freedesktop/systemd1",
+        "org.freedesktop.systemd1.Manager",
+        "SetUnitProperties",
+        "sba(sv)",
+        SCOPE_UNIT,
+        "true",
+        "1",
+        "CPUWeight",
+        "t",
+        str(cpu_weight),
+    ]
+    try:
+        subprocess.run(cmd, capture_output=True, check=True, timeout=5)
+        log.info(f"Set CPUWeight={cpu_weight} on systemd scope {SCOPE_UNIT}")
+        return True
+    except (FileNotFoundError, subprocess.CalledProcessError, subprocess.TimeoutExpired) as e:
+        log.warning(f"Could not change CPU weight of {SCOPE_UNIT}: {e}")
+        return False
+
+
+class LoopLagMonitor:
+    """
+    Measure how late the event loop runs a periodic callback (its responsiveness).
+
+    Sampling only runs between start() and stop(), so an idle service is not woken up;
+    overlapping start()/stop() pairs keep it running until the last stop(). Both must be
+    called on the loop's thread.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, interval: float = 0.05, samples: int = 1200):
+        self._loop = loop
+        self._interval = interval
+        self._lags = deque(maxlen=samples)
+        self._expected = None
+        self._handle = None
+        self._users = 0
+
+    def start(self):
+        self._users += 1
+        if self._handle is None:
+            self._expected = time.monotonic() + self._interval
+            self._handle = self._loop.call_later(self._interval, self._tick)
+
+    def stop(self):
+        self._users = max(0, self._users - 1)
+        if self._users == 0:
+            self.close()
+
+    def close(self):
+        """Stop sampling regardless of outstanding start() calls."""
+        self._users = 0
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+
+    def reset(self):
+        self._lags.clear()
+
+    def _tick(self):
+        now = time.monotonic()
+        self._lags.append(max(0.0, now - self._expected))
+        self._expected = now + self._interval
+        self._handle = self._loop.call_later(self._interval, self._tick)
+
+    def stats(self) -> dict:
+        """p95 and max lag in milliseconds over the retained samples."""
+        if not self._lags:
+            return {"p95_ms": 0.0, "max_ms": 0.0}
+        lags = sorted(self._lags)
+        p95 = lags[min(len(lags) - 1, int(len(lags) * 0.95))]
+        return {"p95_ms": p95 * 1000.0, "max_ms": lags[-1] * 1000.0}
+
+
+def run_benchmark(audio_file: str, model_name: str = "base", device: str = "cpu", runs: int = 3) -> int:
+    """
+    Transcribe audio_file under each preset and print latency and event-loop lag.
+
+    Presets run from least to most restrictive because nice levels cannot be lowered again
+    without privileges.
+    """
+    import torch
+    import whisper
+
+    model = whisper.load_model(model_name, device="cuda" if device == "gpu" else "cpu")
+    audio = whisper.load_audio(audio_file)
+    use_fp16 = device == "gpu"
+
+    async def _measure(policy):
+        loop = asyncio.get_running_loop()
+        monitor = LoopLagMonitor(loop, interval=0.01)
+        torch.set_num_threads(policy.inference_threads())
+
+        def _work():
+            apply_to_current_thread(policy)
+            started = time.perf_counter()
+            model.transcribe(audio, fp16=use_fp16)
+            return time.perf_counter() - started
+
+        # Warm up thread pools so they exist (and get the policy) before timing.
+        await loop.run_in_executor(None, _work)
+        monitor.start()
+        latencies = [await loop.run_in_executor(None, _work) for _ in range(runs)]
+        monitor.stop()
+        return sorted(latencies)[len(latencies) // 2], monitor.stats()
+
+    print(f"{'policy':<12}{'latency_s':>12}{'loop_p95_ms':>14}{'loop_max_ms':>14}")
+    for name, policy in PRESETS.items():
+        if policy.scope:
+            move_to_scope()
+        latency, lag = asyncio.run(_measure(policy))
+        print(f"{name:<12}{latency:>12.2f}{lag['p95_ms']:>14.1f}{lag['max_ms']:>14.1f}")
+    return 0
@@ -1,29 +1,79 @@
 #!/usr/bin/env python3
 
 import asyncio
+import ctypes
+import gc
 import math
 import os
+import select
 import signal
+import stat
 import subprocess
 import sys
-import syslog
 import tempfile
 import threading
 import time
 import uuid
 import wave
 from array import array
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Optional
 
 import whisper
 from dbus_next.aio import MessageBus
 from dbus_next.service import ServiceInterface, method, signal as dbus_signal
 
+from .decoding import DecodingPolicy, describe_options
+from .degeneration import DegenerationGuard
+from .features import IncrementalLogMel, PrecomputedMel, install_mel_passthrough, n_mels_for_model
+from .history import HistoryStore
+from .ingest import PcmConverter, parse_format, pcm_to_float
+from .logger import get_logger, log_stats, setup_logging, shutdown_logging
+from .postprocess import TextPostProcessor
+from .profiling import NULL_PROFILE, Profiler
+from .scheduling import (
+    DEFAULT_CPU_WEIGHT,
+    PRESETS,
+    SCOPE_CPU_WEIGHT,
+    LoopLagMonitor,
+    SchedulingPolicy,
+    apply_to_current_thread,
+    move_to_scope,
+    set_scope_weight,
+)
+
 BUS_NAME = "org.gnome.Shell.Extensions.Speech2Text"
 OBJECT_PATH = "/org/gnome/Shell/Extensions/Speech2Text"
 INTERFACE_NAME = "org.gnome.Shell.Extensions.Speech2Text"
 
+log = get_logger()
+
+# Normalized RMS below which audio is treated as digital silence (muted/missing input).
+SILENCE_RMS_THRESHOLD = 0.001
+
+# End-of-speech detection: a 100ms frame counts as speech when its RMS is at least
+# SPEECH_TO_NOISE_RATIO times the noise floor (the quietest frame of the last
+# NOISE_FLOOR_WINDOW seconds) and at least SPEECH_RMS_MIN.
+SPEECH_TO_NOISE_RATIO = 4.0
+SPEECH_RMS_MIN = 0.005
+NOISE_FLOOR_WINDOW = 10.0
+
+# Seconds between idle/memory-pressure checks for the resident Whisper model.
+MODEL_EVICTION_CHECK_INTERVAL = 15.0
+# PSI memory avg10 percentages above which the model is dropped early.
+MEMORY_PSI_SOME_AVG10 = 20.0
+MEMORY_PSI_FULL_AVG10 = 5.0
+
+# Audio submitted through TranscribeStream: read size, maximum length, seconds without
+# data after which reading stops, and id prefix (lets the extension ignore signals for
+# transcriptions it did not start).
+STREAM_READ_SIZE = 64 * 1024
+MAX_STREAM_SECONDS = 600
+STREAM_IDLE_TIMEOUT = 30.0
+STREAM_ID_PREFIX = "stream-"
+
 if TYPE_CHECKING:
     # dbus-next uses D-Bus type signature strings in annotations like: param: 's' -> 'b'
     # Static type checkers may flag these as undefined forward references; define them for typing only.
@@ -33,12 +83,244 @@ if TYPE_CHECKING:
     class ss: ...
     class sb: ...
     class bas: ...
+    class d: ...
+    class h: ...
+    class x: ...
+    # Array-of-struct signatures such as 'a(sdx)' read as a call of a on the struct name.
+    class a: ...
+    class xsdssddssd: ...
+    class sdx: ...
+
+
+class _SilenceMonitor:
+    """
+    Tail the WAV file ffmpeg is writing and track signal energy while recording.
+
+    poll() returns "no_input" if nothing above the digital-silence threshold was heard for
+    no_input_timeout seconds, "silence" if no speech was heard for silence_timeout seconds
+    after speech, and None otherwise. A timeout of 0 disables it. Speech is judged against
+    the measured noise floor, so room noise on a live microphone does not count as speech.
+    Every PCM chunk read is also passed to sink, if given (e.g. feature extraction).
+    """
+
+    def __init__(self, wav_path: str, silence_timeout: float, no_input_timeout: float, sink=None):
+        self.wav_path = wav_path
+        self.silence_timeout = silence_timeout
+        self.no_input_timeout = no_input_timeout
+        self.sink = sink
+        self.sink_failed = False
+        self.heard_input = False
+        self.heard_speech = False
+        self.last_rms = 0.0
+        self.noise_floor = 0.0
+        self._levels = deque()  # (time, 100ms frame RMS) within NOISE_FLOOR_WINDOW
+        self._fh = None
+        self._data_offset = None
+        self._pending = b""
+        self._started = time.time()
+        self._last_voice = self._started
+
+    @property
+    def enabled(self) -> bool:
+        return self.silence_timeout > 0 or self.no_input_timeout > 0
+
+    def _read_pcm(self) -> bytes:
+        if self._fh is None:
+            if not os.path.exists(self.wav_path):
+                return b""
+            self._fh = open(self.wav_path, "rb")
+
+        if self._data_offset is None:
+            # ffmpeg may emit extra chunks (e.g. LIST) before "data"; locate it explicitly.
+            self._fh.seek(0)
+            header = self._fh.read(4096)
+            idx = header.find(b"data", 12)
+            if idx < 0 or len(header) < idx + 8:
+                return b""
+            self._data_offset = idx + 8
+            self._fh.seek(self._data_offset)
+
+        data = self._pending + self._fh.read()
+        # Keep 16-bit sample alignment across reads.
+        if len(data) % 2:
+            self._pending = data[-1:]
+            data = data[:-1]
+        else:
+            self._pending = b""
+        return data
+
+    def _feed_sink(self, data: bytes):
+        if not data or self.sink is None:
+            return
+        try:
+            self.sink(data)
+        except Exception as e:
+            log.warning(f"PCM sink failed, disabling it for this recording: {e}")
+            self.sink = None
+            self.sink_failed = True
+
+    def drain(self):
+        """Pass any PCM written since the last poll to the sink (call after ffmpeg exits)."""
+        try:
+            self._feed_sink(self._read_pcm())
+        except OSError:
+            self.sink_failed = self.sink is not None
+
+    def poll(self) -> Optional[str]:
+        if not self.enabled and self.sink is None:
+            return None
+
+        now = time.time()
+        try:
+            data = self._read_pcm()
+        except OSError:
+            data = b""
+
+        self._feed_sink(data)
+        if not self.enabled:
+            return None
+
+        if data:
+            samples = array("h")
+            samples.frombytes(data)
+            frames = []
+            for start in range(0, len(samples), 1600):
+                frame = samples[start : start + 1600]
+                frames.append(sum(float(v) * float(v) for v in frame) / len(frame))
+            self.last_rms = math.sqrt(sum(frames) / len(frames)) / 32768.0
+            if self.last_rms >= SILENCE_RMS_THRESHOLD:
+                self.heard_input = True
+
+            levels = [math.sqrt(f) / 32768.0 for f in frames]
+            self._levels.extend((now, level) for level in levels)
+            while now - self._levels[0][0] > NOISE_FLOOR_WINDOW:
+                self._levels.popleft()
+            self.noise_floor = min(level for _, level in self._levels)
+            if max(levels) >= max(SPEECH_RMS_MIN, self.noise_floor * SPEECH_TO_NOISE_RATIO):
+                self.heard_speech = True
+                self._last_voice = now
+
+        if self.heard_speech and self.silence_timeout > 0:
+            if now - self._last_voice >= self.silence_timeout:
+                return "silence"
+        if not self.heard_input and self.no_input_timeout > 0:
+            if now - self._started >= self.no_input_timeout:
+                return "no_input"
+        return None
+
+    def close(self):
+        if self._fh is not None:
+            try:
+                self._fh.close()
+            except Exception:
+                pass
+            self._fh = None
+
+
+class _DecodeContext:
+    """
+    Rolling decode context carried across consecutive dictations.
+
+    Holds the last max_tokens tokens of previous transcriptions (encoded once, as they
+    arrive) and hands them back to Whisper as initial_prompt. The context is dropped
+    after idle_reset seconds without a transcription, since a long pause usually means
+    the user moved on to a different document.
+    """
+
+    def __init__(self, max_tokens: int = 128, idle_reset: float = 600.0):
+        self.max_tokens = max_tokens
+        self.idle_reset = idle_reset
+        self._lock = threading.Lock()
+        self._tokenizer = None
+        self._tokens = []
+        self._prompt = None
+        self._updated = 0.0
+
+    def reset(self, drop_tokenizer: bool = False):
+        with self._lock:
+            self._tokens = []
+            self._prompt = None
+            self._updated = 0.0
+            if drop_tokenizer:
+                self._tokenizer = None
+
+    def _get_tokenizer(self, model):
+        if self._tokenizer is None:
+            from whisper.tokenizer import get_tokenizer
+
+            try:
+                self._tokenizer = get_tokenizer(
+                    multilingual=model.is_multilingual, num_languages=model.num_languages
+                )
+            except TypeError:
+                # Older whisper releases don't take num_languages.
+                self._tokenizer = get_tokenizer(multilingual=model.is_multilingual)
+        return self._tokenizer
+
+    def prompt(self) -> Optional[str]:
+        """Return the cached prompt text, or None if there is no (fresh) context."""
+        with self._lock:
+            if self._tokens and time.time() - self._updated > self.idle_reset:
+                self._tokens = []
+                self._prompt = None
+            return self._prompt
+
+    def append(self, model, text: str):
+        """Encode a finished transcription and append it to the rolling window."""
+        with self._lock:
+            tokenizer = self._get_tokenizer(model)
+            self._tokens.extend(tokenizer.encode(" " + text.strip()))
+            self._tokens = self._tokens[-self.max_tokens :]
+            self._prompt = tokenizer.decode(self._tokens).strip()
+            self._updated = time.time()
+
+    @property
+    def token_count(self) -> int:
+        return len(self._tokens)
+
+
+class _TypingStream:
+    """
+    Types text pieces in order on the shared single-worker typing executor.
+
+    Pieces can be fed while transcription is still running so text injection overlaps
+    inference; finish() reports overall success once every queued piece has been typed.
+    """
+
+    def __init__(self, executor: ThreadPoolExecutor, type_fn):
+        self._executor = executor
+        self._type_fn = type_fn
+        self._futures = []
+        self.pieces = []
+        self.text = ""  # everything fed so far, joined exactly as it is typed
+
+    def feed(self, piece: str):
+        # Only spaces: a spoken "new line" at either end of a piece must survive.
+        piece = piece.strip(" ")
+        if not piece:
+            return
+        # Re-insert the word break removed between consecutive pieces, unless a line break
+        # already separates them.
+        joined = not self.pieces or piece.startswith("\n") or self.pieces[-1].endswith("\n")
+        chunk = piece if joined else f" {piece}"
+        self.pieces.append(piece)
+        self.text += chunk
+        self._futures.append(self._executor.submit(self._type_fn, chunk))
+
+    def finish(self, callback):
+        futures = list(self._futures)
+
+        def _done():
+            callback(bool(futures) and all(f.result() for f in futures))
+
+        # Same single worker, so this runs after every piece queued above.
+        self._executor.submit(_done)
 
 
 class Speech2TextService(ServiceInterface):
     """D-Bus service for speech-to-text functionality (dbus-next/asyncio)."""
 
-    def __init__(self, loop: asyncio.AbstractEventLoop):
+    def __init__(self, loop: asyncio.AbstractEventLoop, profile: bool = False):
         super().__init__(INTERFACE_NAME)
         self._loop = loop
 
@@ -47,13 +329,64 @@ class Speech2TextService(ServiceInterface):
         self.whisper_model = None
         self.whisper_model_name = "base"
         self.whisper_device = "cpu"  # "cpu" or "gpu" (maps to whisper device "cpu"/"cuda")
+        self._model_lock = threading.Lock()
+
+        # Output stage: typing is serialized (order matters), clipboard runs alongside it.
+        self._typing_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="s2t-type")
+        self._clipboard_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="s2t-clip")
         self.dependencies_checked = False
         self.missing_deps = []
 
-        # Initialize syslog for proper journalctl logging
-        syslog.openlog("speech2text-extension-service", syslog.LOG_PID, syslog.LOG_USER)
-        syslog.syslog(syslog.LOG_INFO, "Speech2Text D-Bus service started")
-        print("Speech2Text D-Bus service started")
+        # Live silence detection during capture (seconds; 0 disables).
+        # Auto-stop on end of speech is opt-in; muted/dead inputs are aborted by default.
+        self.silence_timeout = 0.0
+        self.no_input_timeout = 5.0
+
+        # Previous dictations are fed back as initial_prompt for the next one.
+        self.decode_context = _DecodeContext()
+
+        # "auto" detects per dictation, "auto-sticky" reuses the first detection, else pinned.
+        self.whisper_language = "auto"
+        self.sticky_language = None
+        self.language_detections = 0
+        self.language_cache_hits = 0
+
+        # Idle/memory-pressure eviction of the resident model (seconds; 0 disables idle eviction).
+        self.model_idle_timeout = 15 * 60.0
+        self.last_model_use = time.time()
+        self.model_loads = 0
+        self.model_unloads = 0
+        self._cgroup_memory_events = None
+        self.transcriptions_total = 0
+
+        # Beam/greedy, fallback temperatures and conditioning chosen per clip and deadline.
+        self.decoding_policy = DecodingPolicy()
+        # Cuts short repetition loops and hallucinated segments while decoding.
+        self.decode_guard = DegenerationGuard()
+        self.temperature_fallbacks_total = 0
+
+        # Inference runs at reduced priority on a subset of CPUs so the desktop stays smooth.
+        self.scheduling_policy = PRESETS["desktop"]
+        self._scope_weight = None  # CPUWeight of our systemd scope, None until moved into one
+        # Samples event-loop lag only while a transcription runs.
+        self.loop_lag = LoopLagMonitor(self._loop)
+
+        # Replacements / spoken punctuation / snippets applied to every transcription.
+        self.postprocessor = TextPostProcessor()
+
+        # Transcription history (written off the hot path by its own thread).
+        try:
+            self.history = HistoryStore()
+        except Exception as e:
+            log.error(f"Transcription history unavailable: {e}")
+            self.history = None
+
+        # Per-recording profile reports (--profile / --debug).
+        self.profiler = Profiler(enabled=profile)
+
+        log.info("Speech2Text D-Bus service started")
+
+        self._loop.call_later(MODEL_EVICTION_CHECK_INTERVAL, self._check_model_eviction)
 
     def _validate_whisper_config(self, model: str, device: str) -> tuple[str, str]:
         allowed_models = {
@@ -86,6 +419,40 @@ class Speech2TextService(ServiceInterface):
 
         return model, device
 
+    def _validate_whisper_language(self, language: str) -> str:
+        """Normalize a language setting to "auto", "auto-sticky" or a Whisper language code."""
+        from whisper.tokenizer import LANGUAGES, TO_LANGUAGE_CODE
+
+        language = (language or "").strip().lower()
+        if language in ("", "auto"):
+            return "auto"
+        if language == "auto-sticky":
+            return language
+        if language in LANGUAGES:
+            return language
+        if language in TO_LANGUAGE_CODE:
+            return TO_LANGUAGE_CODE[language]
+        raise ValueError(f"Unsupported Whisper language: {language}")
+
+    def _resolve_language(self, model, external: bool = False) -> tuple[Optional[str], bool]:
+        """
+        Pick the language to pass to model.transcribe.
+
+        Returns (language, cached). language=None makes Whisper run its own detection
+        pass; cached is True when a previously detected sticky language is reused.
+        External (TranscribeStream) audio never uses the sticky dictation language.
+        """
+        if not model.is_multilingual:
+            return "en", False
+        if self.whisper_language == "auto":
+            return None, False
+        if self.whisper_language == "auto-sticky":
+            if self.sticky_language and not external:
+                self.language_cache_hits += 1
+                return self.sticky_language, True
+            return None, False
+        return self.whisper_language, False
+
     def _emit_threadsafe(self, fn, *args):
         """Emit a D-Bus signal safely from worker threads."""
         try:
@@ -99,50 +466,152 @@ class Speech2TextService(ServiceInterface):
 
     def _load_whisper_model(self):
         """Lazy load Whisper model using configured model/device."""
-        if self.whisper_model is None:
-            try:
-                # Avoid oversubscribing CPU threads (especially important in VMs)
+        with self._model_lock:
+            if self.whisper_model is None:
                 try:
-                    import torch  # type: ignore
+                    # Avoid oversubscribing CPU threads (especially important in VMs)
+                    try:
+                        import torch  # type: ignore
 
-                    cpu_count = os.cpu_count() or 1
-                    torch.set_num_threads(max(1, min(4, cpu_count)))
-                    torch.set_num_interop_threads(1)
-                except Exception:
-                    # If torch isn't available yet for any reason, don't fail here.
-                    pass
+                        torch.set_num_threads(self.scheduling_policy.inference_threads())
+                        torch.set_num_interop_threads(1)
+                    except Exception:
+                        # If torch isn't available yet for any reason, don't fail here.
+                        pass
 
-                print("Loading Whisper model...")
-                whisper_device = "cpu" if self.whisper_device == "cpu" else "cuda"
+                    whisper_device = "cpu" if self.whisper_device == "cpu" else "cuda"
 
-                if self.whisper_device == "gpu":
-                    try:
-                        import torch  # type: ignore
+                    if self.whisper_device == "gpu":
+                        try:
+                            import torch  # type: ignore
+
+                            if not torch.cuda.is_available():
+                                raise RuntimeError("torch.cuda.is_available() is False")
+                        except Exception as e:
+                            raise RuntimeError(
+                                "GPU mode selected but CUDA is not available. "
+                                "Reinstall the service with GPU support and ensure NVIDIA drivers/CUDA are installed, "
+                                "or switch the extension setting back to CPU."
+                            ) from e
+
+                    log.info(f"Loading Whisper model: {self.whisper_model_name} ({self.whisper_device})")
+                    load_started = time.time()
+                    self.whisper_model = whisper.load_model(
+                        self.whisper_model_name, device=whisper_device
+                    )
+                    self.model_loads += 1
+                    log.info(f"Whisper model loaded successfully in {time.time() - load_started:.1f}s")
+                except Exception as e:
+                    log.error(f"Failed to load Whisper model: {e}")
+                    raise e
+            self.last_model_use = time.time()
+            return self.whisper_model
+
+    def _prefetch_whisper_model(self):
+        """Start loading the model in the background so a reload overlaps with recording."""
+        if self.whisper_model is not None:
+            return
 
-                        if not torch.cuda.is_available():
-                            raise RuntimeError("torch.cuda.is_available() is False")
-                    except Exception as e:
-                        raise RuntimeError(
-                            "GPU mode selected but CUDA is not available. "
-                            "Reinstall the service with GPU support and ensure NVIDIA drivers/CUDA are installed, "
-                            "or switch the extension setting back to CPU."
-                        ) from e
-
-                syslog.syslog(
-                    syslog.LOG_INFO,
-                    f"Loading Whisper model: {self.whisper_model_name} ({self.whisper_device})",
-                )
-                self.whisper_model = whisper.load_model(
-                    self.whisper_model_name, device=whisper_device
-                )
-                print(
-                    f"Whisper model loaded successfully: {self.whisper_model_name} ({self.whisper_device})"
+        def _load():
+            try:
+                self._load_whisper_model()
+            except Exception:
+                # The transcription path retries and reports the error to the client.
+                pass
+
+        threading.Thread(target=_load, daemon=True).start()
+
+    def _unload_whisper_model(self, reason: str) -> bool:
+        """Drop the resident model and hand its memory back to the system."""
+        with self._model_lock:
+            if self.whisper_model is None:
+                return False
+            busy = any(
+                r.get("status") in ("starting", "recording", "recorded", "transcribing")
+                for r in self.active_recordings.values()
+            )
+            if busy:
+                return False
+
+            self.whisper_model = None
+            self.model_unloads += 1
+
+        gc.collect()
+        try:
+            import torch  # type: ignore
+
+            if torch.cuda.is_available():
+                torch.cuda.empty_cache()
+        except Exception:
+            pass
+        try:
+            # glibc keeps freed arenas around; trim so RSS actually drops.
+            ctypes.CDLL("libc.so.6").malloc_trim(0)
+        except Exception:
+            pass
+
+        log.info(f"Whisper model unloaded ({reason})")
+        return True
+
+    def _memory_pressure(self) -> Optional[str]:
+        """Return a description of current memory pressure, or None if there is none."""
+        try:
+            with open("/proc/pressure/memory") as f:
+                for line in f:
+                    kind, *fields = line.split()
+                    values = dict(field.split("=", 1) for field in fields)
+                    avg10 = float(values.get("avg10", 0.0))
+                    limit = MEMORY_PSI_SOME_AVG10 if kind == "some" else MEMORY_PSI_FULL_AVG10
+                    if avg10 >= limit:
+                        return f"psi {kind} avg10={avg10}"
+        except (OSError, ValueError):
+            pass
+
+        # cgroup v2: memory.events counters increase when the cgroup hits its high/max limits.
+        try:
+            with open("/proc/self/cgroup") as f:
+                cgroup = next(
+                    (line.strip().split("::", 1)[1] for line in f if line.startswith("0::")), None
                 )
-                syslog.syslog(syslog.LOG_INFO, "Whisper model loaded successfully")
-            except Exception as e:
-                print(f"Failed to load Whisper model: {e}")
-                raise e
-        return self.whisper_model
+            if cgroup is not None:
+                with open(os.path.join("/sys/fs/cgroup", cgroup.lstrip("/"), "memory.events")) as f:
+                    events = dict(line.split() for line in f if line.strip())
+                counts = (int(events.get("high", 0)), int(events.get("max", 0)))
+                previous, self._cgroup_memory_events = self._cgroup_memory_events, counts
+                if previous is not None and counts > previous:
+                    return f"cgroup memory events high={counts[0]} max={counts[1]}"
+        except (OSError, ValueError, StopIteration):
+            pass
+
+        return None
+
+    def _check_model_eviction(self):
+        """Periodic check (on the event loop) for idle or memory-pressure model eviction."""
+        try:
+            if self.whisper_model is not None:
+                idle = time.time() - self.last_model_use
+                pressure = self._memory_pressure()
+                reason = None
+                if pressure:
+                    reason = f"memory pressure: {pressure}"
+                elif self.model_idle_timeout > 0 and idle >= self.model_idle_timeout:
+                    reason = f"idle for {idle:.0f}s"
+                if reason is not None:
+                    # gc, cache release and malloc_trim can take a while; keep them off the
+                    # loop. The model lock and busy check make the unload safe from a worker.
+                    self._loop.run_in_executor(None, self._unload_whisper_model, reason)
+            else:
+                # Keep the cgroup event baseline current while nothing is loaded.
+                self._memory_pressure()
+        except Exception as e:
+            log.error(f"Model eviction check failed: {e}")
+        finally:
+            try:
+                self._loop.call_later(MODEL_EVICTION_CHECK_INTERVAL, self._check_model_eviction)
+            except RuntimeError:
+                # Loop closed during shutdown.
+                pass
+
 
     def _wav_rms_normalized(self, wav_path: str) -> float:
         """
@@ -327,9 +796,23 @@ class Speech2TextService(ServiceInterface):
                     except (FileNotFoundError, subprocess.CalledProcessError):
                         return False
         except Exception as e:
-            print(f"Error copying to clipboard: {e}")
+            log.error(f"Error copying to clipboard: {e}")
             return False
 
+    def _type_profiled(self, profile, text, clipboard) -> tuple[bool, bool]:
+        """
+        Type text and wait for the clipboard copy inside the profile's "type" stage.
+
+        Runs on the typing executor so snapshots and report writing stay off the event loop.
+        """
+        profile.begin_stage("type")
+        try:
+            success = self._type_text(text)
+            copied = clipboard.result() if clipboard is not None else True
+        finally:
+            profile.end_stage("type")
+        return success, copied
+
     def _type_text(self, text):
         """Type text using appropriate method for display server."""
         if not text:
@@ -340,7 +823,7 @@ class Speech2TextService(ServiceInterface):
             subprocess.run(["xdotool", "type", "--delay", "10", text], check=True)
             return True
         except Exception as e:
-            print(f"Error typing text: {e}")
+            log.error(f"Error typing text: {e}")
             return False
 
     def _cleanup_recording(self, recording_id):
@@ -352,7 +835,7 @@ class Speech2TextService(ServiceInterface):
                 process = recording_info.get("process")
                 if process and process.poll() is None:
                     try:
-                        print(f"Cleaning up running process for recording {recording_id}")
+                        log.debug("Cleaning up running process for recording %s", recording_id)
                         process.send_signal(signal.SIGINT)
                         time.sleep(0.2)
                         if process.poll() is None:
@@ -369,22 +852,22 @@ class Speech2TextService(ServiceInterface):
                             except Exception:
                                 pass
                     except Exception as e:
-                        print(f"Error cleaning up process: {e}")
+                        log.error(f"Error cleaning up process: {e}")
 
                 # Clean up audio file if it exists
                 audio_file = recording_info.get("audio_file")
                 if audio_file and os.path.exists(audio_file):
                     try:
                         os.unlink(audio_file)
-                        print(f"Cleaned up audio file: {audio_file}")
+                        log.debug("Cleaned up audio file: %s", audio_file)
                     except Exception as e:
-                        print(f"Error cleaning up audio file: {e}")
+                        log.error(f"Error cleaning up audio file: {e}")
 
                 # Remove from active recordings
                 del self.active_recordings[recording_id]
-                print(f"Removed recording {recording_id} from active recordings")
+                log.debug("Removed recording %s from active recordings", recording_id)
         except Exception as e:
-            print(f"Error in cleanup_recording: {e}")
+            log.error(f"Error in cleanup_recording: {e}")
 
     def _record_audio(self, recording_id, max_duration=60):
         """Record audio in a separate thread."""
@@ -398,8 +881,13 @@ class Speech2TextService(ServiceInterface):
 
         recording_info["audio_file"] = audio_file
         recording_info["status"] = "recording"
+        profile = NULL_PROFILE
 
         try:
+            profile = self.profiler.begin(recording_id)
+            recording_info["profile"] = profile
+            profile.begin_stage("record")
+
             # Emit recording started signal
             self._emit_threadsafe(self.RecordingStarted, recording_id)
 
@@ -444,68 +932,86 @@ class Speech2TextService(ServiceInterface):
                 text=True,
             )
             recording_info["process"] = process
-            syslog.syslog(syslog.LOG_INFO, f"FFmpeg process started with PID: {process.pid}")
-            syslog.syslog(syslog.LOG_INFO, f"FFmpeg command: {' '.join(cmd)}")
+            log.debug("FFmpeg process started with PID: %s", process.pid)
+            log.debug("FFmpeg command: %s", " ".join(cmd))
 
             # Check if process started successfully
             time.sleep(0.1)
             if process.poll() is not None:
                 stderr_output = process.stderr.read() if process.stderr else "No stderr available"
-                syslog.syslog(
-                    syslog.LOG_ERR,
-                    f"FFmpeg process failed immediately with return code: {process.returncode}",
-                )
-                syslog.syslog(syslog.LOG_ERR, f"FFmpeg stderr: {stderr_output}")
+                log.error(f"FFmpeg process failed immediately with return code: {process.returncode}")
+                log.error(f"FFmpeg stderr: {stderr_output}")
                 raise Exception(f"FFmpeg failed to start: {stderr_output}")
 
             # Wait for process or manual stop
             start_time = time.time()
+            recording_info["started_at"] = start_time
             min_recording_time = 2.0
-            syslog.syslog(
-                syslog.LOG_INFO,
-                f"Recording on {display_server}, minimum recording time: {min_recording_time}s",
-            )
+            log.debug("Recording on %s, minimum recording time: %ss", display_server, min_recording_time)
 
-            while process.poll() is None:
-                elapsed = time.time() - start_time
+            # Compute log-mel features while recording so transcription can skip the STFT.
+            features = None
+            try:
+                n_mels = (
+                    self.whisper_model.dims.n_mels
+                    if self.whisper_model is not None
+                    else n_mels_for_model(self.whisper_model_name)
+                )
+                features = IncrementalLogMel(n_mels)
+            except Exception as e:
+                log.warning(f"Incremental feature extraction unavailable: {e}")
 
-                if recording_info.get("stop_requested", False):
-                    if elapsed < min_recording_time:
-                        syslog.syslog(
-                            syslog.LOG_INFO,
-                            f"Delaying stop request ({elapsed:.1f}s < {min_recording_time}s)",
-                        )
-                        time.sleep(0.1)
-                        continue
-                    break
+            monitor = _SilenceMonitor(
+                audio_file,
+                self.silence_timeout,
+                self.no_input_timeout,
+                sink=features.feed if features is not None else None,
+            )
+            try:
+                while process.poll() is None:
+                    elapsed = time.time() - start_time
+
+                    if not recording_info.get("stop_requested", False):
+                        auto_reason = monitor.poll()
+                        if auto_reason and (auto_reason == "no_input" or elapsed >= min_recording_time):
+                            log.info(f"Auto-stopping recording {recording_id} after {elapsed:.1f}s: {auto_reason}")
+                            recording_info["stop_reason"] = auto_reason
+                            recording_info["stop_requested"] = True
+
+                    if recording_info.get("stop_requested", False):
+                        if elapsed < min_recording_time and recording_info.get("stop_reason") != "no_input":
+                            log.debug("Delaying stop request (%.1fs < %ss)", elapsed, min_recording_time)
+                            time.sleep(0.1)
+                            continue
+                        break
 
-                time.sleep(0.1)
+                    time.sleep(0.1)
+            except Exception:
+                monitor.close()
+                raise
 
             if recording_info.get("stop_requested", False):
-                syslog.syslog(
-                    syslog.LOG_INFO,
-                    f"Stop requested for recording {recording_id}, terminating FFmpeg process",
-                )
+                log.info(f"Stop requested for recording {recording_id}, terminating FFmpeg process")
                 try:
-                    syslog.syslog(syslog.LOG_INFO, "Sending 'q' to FFmpeg stdin for graceful exit")
+                    log.debug("Sending 'q' to FFmpeg stdin for graceful exit")
                     try:
                         process.stdin.write("q\n")
                         process.stdin.flush()
                         process.stdin.close()
                         process.wait(timeout=2.0)
-                        syslog.syslog(syslog.LOG_INFO, "FFmpeg terminated gracefully with 'q' command")
+                        log.debug("FFmpeg terminated gracefully with 'q' command")
                     except (subprocess.TimeoutExpired, BrokenPipeError, OSError):
-                        syslog.syslog(syslog.LOG_WARNING, "'q' command failed, trying SIGINT")
+                        log.warning("'q' command failed, trying SIGINT")
                         process.send_signal(signal.SIGINT)
                         try:
                             process.wait(timeout=2.0)
-                            syslog.syslog(syslog.LOG_INFO, "FFmpeg terminated with SIGINT")
+                            log.info("FFmpeg terminated with SIGINT")
                         except subprocess.TimeoutExpired:
-                            syslog.syslog(syslog.LOG_WARNING, "SIGINT timeout, force killing")
+                            log.warning("SIGINT timeout, force killing")
                             process.kill()
                             process.wait()
                 except Exception as e:
-                    syslog.syslog(syslog.LOG_ERR, f"Error stopping recording process: {e}")
+                    log.error(f"Error stopping recording process: {e}")
                     try:
                         process.kill()
                         process.wait()
@@ -513,54 +1019,59 @@ class Speech2TextService(ServiceInterface):
                         pass
 
             process.wait()
-            syslog.syslog(
-                syslog.LOG_INFO,
-                f"FFmpeg process finished with return code: {process.returncode}",
-            )
+            log.debug("FFmpeg process finished with return code: %s", process.returncode)
 
             # Capture any stderr output from FFmpeg (safely)
             try:
                 if process.stderr and not process.stderr.closed:
                     stderr_output = process.stderr.read()
                     if stderr_output:
-                        syslog.syslog(syslog.LOG_INFO, f"FFmpeg stderr output: {stderr_output}")
+                        log.debug("FFmpeg stderr output: %s", stderr_output)
             except (ValueError, OSError) as e:
-                syslog.syslog(syslog.LOG_DEBUG, f"Could not read stderr (process terminated): {e}")
+                log.debug("Could not read stderr (process terminated): %s", e)
 
             time.sleep(0.3)
 
+            monitor.drain()
+            monitor.close()
+            if features is not None and not monitor.sink_failed:
+                recording_info["features"] = features
+            profile.end_stage("record")
+
+            stop_reason = recording_info.get("stop_reason", "completed")
+            if stop_reason == "no_input":
+                # Muted or missing input: skip validation and transcription entirely.
+                recording_info["status"] = "failed"
+                self._emit_threadsafe(self.RecordingStopped, recording_id, stop_reason)
+                self._emit_threadsafe(
+                    self.RecordingError,
+                    recording_id,
+                    f"No audio input detected for {self.no_input_timeout:g}s (microphone muted or silent). "
+                    "Check your microphone input and that PulseAudio/PipeWire default source is correct.",
+                )
+                return
+
             # Check if we have valid audio with retry logic for short recordings
             audio_valid = False
-            syslog.syslog(syslog.LOG_INFO, f"*** Checking audio file: {audio_file}")
+            log.debug("Checking audio file: %s", audio_file)
             for attempt in range(5):
                 if os.path.exists(audio_file):
                     file_size = os.path.getsize(audio_file)
-                    syslog.syslog(
-                        syslog.LOG_INFO,
-                        f"Attempt {attempt + 1}: File exists, size: {file_size} bytes",
-                    )
+                    log.debug("Attempt %d: File exists, size: %d bytes", attempt + 1, file_size)
                     if file_size > 100:
                         audio_valid = True
-                        syslog.syslog(
-                            syslog.LOG_INFO,
-                            f"Audio validation successful on attempt {attempt + 1}",
-                        )
+                        log.debug("Audio validation successful on attempt %d", attempt + 1)
                         break
-                    syslog.syslog(
-                        syslog.LOG_WARNING,
-                        f"File too small ({file_size} bytes), retrying...",
-                    )
+                    log.debug("File too small (%d bytes), retrying...", file_size)
                 else:
-                    syslog.syslog(
-                        syslog.LOG_WARNING,
-                        f"Attempt {attempt + 1}: File doesn't exist yet",
-                    )
+                    log.debug("Attempt %d: File doesn't exist yet", attempt + 1)
                 if attempt < 4:
                     time.sleep(0.2)
 
             if audio_valid:
                 recording_info["status"] = "recorded"
-                self._emit_threadsafe(self.RecordingStopped, recording_id, "completed")
+                recording_info["recorded_at"] = time.time()
+                self._emit_threadsafe(self.RecordingStopped, recording_id, stop_reason)
                 self._transcribe_audio(recording_id)
             else:
                 recording_info["status"] = "failed"
@@ -569,7 +1080,7 @@ class Speech2TextService(ServiceInterface):
                     f"Audio validation failed: file_size={file_size} bytes, "
                     f"file_exists={os.path.exists(audio_file)}"
                 )
-                syslog.syslog(syslog.LOG_ERR, f"DEBUG: {error_msg}")
+                log.error(error_msg)
                 self._emit_threadsafe(
                     self.RecordingError,
                     recording_id,
@@ -580,8 +1091,243 @@ class Speech2TextService(ServiceInterface):
             recording_info["status"] = "failed"
             self._emit_threadsafe(self.RecordingError, recording_id, str(e))
         finally:
+            profile.complete(output_pending=recording_info.get("status") == "completed")
+            self._cleanup_recording(recording_id)
+
+    def _read_stream(self, recording_id, fd, pcm_format):
+        """Read PCM submitted through TranscribeStream until EOF, then transcribe it."""
+        recording_info = self.active_recordings.get(recording_id)
+        if not recording_info:
+            os.close(fd)
+            return
+
+        recording_info["status"] = "recording"
+        profile = NULL_PROFILE
+
+        try:
+            profile = self.profiler.begin(recording_id)
+            recording_info["profile"] = profile
+            profile.begin_stage("record")
+            self._emit_threadsafe(self.RecordingStarted, recording_id)
+            recording_info["started_at"] = time.time()
+
+            features = None
+            try:
+                n_mels = (
+                    self.whisper_model.dims.n_mels
+                    if self.whisper_model is not None
+                    else n_mels_for_model(self.whisper_model_name)
+                )
+                features = IncrementalLogMel(n_mels)
+            except Exception as e:
+                log.warning(f"Incremental feature extraction unavailable: {e}")
+
+            # A memfd or regular file is usually handed over after being written; read it all.
+            if stat.S_ISREG(os.fstat(fd).st_mode):
+                os.lseek(fd, 0, os.SEEK_SET)
+
+            converter = PcmConverter(pcm_format)
+            pcm = bytearray()
+            max_bytes = MAX_STREAM_SECONDS * 16000 * 2
+            last_data = time.monotonic()
+            while not recording_info.get("stop_requested", False):
+                ready, _, _ = select.select([fd], [], [], 0.2)
+                if not ready:
+                    if time.monotonic() - last_data > STREAM_IDLE_TIMEOUT:
+                        log.warning(
+                            f"Stream {recording_id} sent no data for {STREAM_IDLE_TIMEOUT:g}s, "
+                            "transcribing what was read"
+                        )
+                        break
+                    continue
+                chunk = os.read(fd, STREAM_READ_SIZE)
+                if not chunk:
+                    break
+                last_data = time.monotonic()
+                data = converter.feed(chunk)[: max_bytes - len(pcm)]
+                if features is not None:
+                    features.feed(data)
+                pcm.extend(data)
+                if len(pcm) >= max_bytes:
+                    log.warning(
+                        f"Stream {recording_id} exceeded {MAX_STREAM_SECONDS}s, transcribing what was read"
+                    )
+                    break
+            data = converter.flush()[: max_bytes - len(pcm)]
+            if features is not None:
+                features.feed(data)
+            pcm.extend(data)
+            profile.end_stage("record")
+
+            if recording_info.get("status") == "cancelled":
+                return
+            if not pcm:
+                recording_info["status"] = "failed"
+                self._emit_threadsafe(self.RecordingError, recording_id, "No audio received on stream")
+                return
+
+            log.info(f"Stream {recording_id} read: {len(pcm) / 32000.0:.1f}s of audio ({pcm_format})")
+            recording_info["samples"] = pcm_to_float(bytes(pcm))
+            if features is not None:
+                recording_info["features"] = features
+            recording_info["status"] = "recorded"
+            recording_info["recorded_at"] = time.time()
+            self._emit_threadsafe(self.RecordingStopped, recording_id, "completed")
+            self._transcribe_audio(recording_id)
+
+        except Exception as e:
+            recording_info["status"] = "failed"
+            self._emit_threadsafe(self.RecordingError, recording_id, str(e))
+        finally:
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+            profile.complete()
             self._cleanup_recording(recording_id)
 
+    def _streaming_chunks(self, levels, rate: int) -> list:
+        """
+        Split a clip longer than one Whisper window into <=30s chunks.
+
+        levels holds rate loudness values per second of audio (squared samples, or the mean
+        log-mel value of each feature frame); the returned bounds index into it. Each cut is
+        placed at the quietest 100ms in the last 5s before the window boundary so words are
+        not split across chunks.
+        """
+        import numpy as np
+        from whisper.audio import CHUNK_LENGTH
+
+        window = CHUNK_LENGTH * rate
+        frame = rate // 10
+        search = 5 * rate
+        bounds = []
+        start = 0
+        while len(levels) - start > window:
+            lo = start + window - search
+            frames = levels[lo : lo + search].reshape(-1, frame)
+            cut = lo + int(np.argmin(frames.mean(axis=1))) * frame + frame // 2
+            bounds.append((start, cut))
+            start = cut
+        bounds.append((start, len(levels)))
+        return bounds
+
+    def _chunk_inputs(self, model, audio_input) -> list:
+        """transcribe() inputs for the <=30s chunks of a clip longer than one window."""
+        from whisper.audio import HOP_LENGTH, N_FRAMES, SAMPLE_RATE
+
+        if isinstance(audio_input, PrecomputedMel):
+            mel = audio_input.mel
+            if mel.shape[0] == model.dims.n_mels:
+                # Slice the capture features instead of decoding the file again. Every chunk
+                # gets the clip's own 30s of padding frames, as transcribe() expects.
+                import torch  # type: ignore
+
+                content = mel.shape[-1] - N_FRAMES
+                padding = mel[:, content:]
+                levels = mel[:, :content].mean(dim=0).numpy()
+                return [
+                    PrecomputedMel(
+                        torch.cat([mel[:, start:end], padding], dim=1), None, (end - start) * HOP_LENGTH
+                    )
+                    for start, end in self._streaming_chunks(levels, SAMPLE_RATE // HOP_LENGTH)
+                ]
+            audio_input = audio_input.source
+
+        audio = whisper.load_audio(audio_input) if isinstance(audio_input, str) else audio_input
+        return [audio[start:end] for start, end in self._streaming_chunks(audio**2, SAMPLE_RATE)]
+
+    def _transcribe_streaming(self, model, audio_input, on_text, initial_prompt=None, language=None, **options):
+        """
+        Transcribe chunk by chunk, handing each chunk's text to on_text as soon as it is ready.
+
+        Clips up to 30s are a single chunk and behave exactly like model.transcribe. Each
+        chunk is conditioned on the text before it and reuses the first detected language.
+        """
+        from whisper.audio import N_SAMPLES
+
+        if isinstance(audio_input, PrecomputedMel) and audio_input.num_samples <= N_SAMPLES:
+            result = model.transcribe(
+                audio_input, initial_prompt=initial_prompt, language=language, **options
+            )
+            on_text(result["text"].strip())
+            return result
+
+        texts = []
+        segments = []
+        prompt = initial_prompt
+        for chunk in self._chunk_inputs(model, audio_input):
+            result = model.transcribe(chunk, initial_prompt=prompt, language=language, **options)
+            language = language or result.get("language")
+            segments.extend(result.get("segments", []))
+            piece = result["text"].strip()
+            if piece:
+                texts.append(piece)
+                on_text(piece)
+                prompt = f"{prompt} {piece}" if prompt else piece
+        return {"text": " ".join(texts), "segments": segments, "language": language}
+
+    def _audio_duration(self, audio_file, features=None) -> float:
+        """Clip length in seconds, from the capture features, the waveform or the WAV header."""
+        if features is not None:
+            return features.num_samples / 16000.0
+        if not isinstance(audio_file, str):
+            return len(audio_file) / 16000.0
+        try:
+            with wave.open(audio_file, "rb") as wf:
+                return wf.getnframes() / float(wf.getframerate() or 16000)
+        except Exception:
+            return 0.0
+
+    def _apply_scheduling_policy(self):
+        """
+        Apply the inference scheduling policy to the calling (transcribing) thread.
+
+        The systemd scope holds the whole process; with the option off again it gets the
+        default CPU weight back.
+        """
+        policy = self.scheduling_policy
+        try:
+            weight = SCOPE_CPU_WEIGHT if policy.scope else DEFAULT_CPU_WEIGHT
+            if self._scope_weight is None:
+                if policy.scope and move_to_scope(weight):
+                    self._scope_weight = weight
+            elif self._scope_weight != weight and set_scope_weight(weight):
+                self._scope_weight = weight
+            apply_to_current_thread(policy)
+        except Exception as e:
+            log.warning(f"Could not apply scheduling policy {policy}: {e}")
+
+    def _postprocess_text(self, text):
+        """Apply user rules to transcribed text; never lose the transcription over a rule error."""
+        try:
+            return self.postprocessor.process(text)
+        except Exception as e:
+            log.error(f"Text post-processing failed, using raw transcription: {e}")
+            return text
+
+    def _deliver_text(self, text, type_text, copy_to_clipboard, stream=None, profile=NULL_PROFILE):
+        """
+        Hand finished text to the output stage without blocking the calling thread.
+
+        Clipboard copy and typing run concurrently; TextTyped is emitted once typing
+        (including any pieces already streamed through stream) has finished.
+        """
+        if copy_to_clipboard:
+            self._clipboard_executor.submit(self._copy_to_clipboard, text)
+
+        if type_text:
+            if stream is None:
+                stream = _TypingStream(self._typing_executor, self._type_text)
+                stream.feed(text)
+            profile.begin_stage("type")
+
+            def _typed(ok):
+                profile.end_stage("type")
+                self._emit_threadsafe(self.TextTyped, text, ok)
+
+            stream.finish(_typed)
+
     def _transcribe_audio(self, recording_id):
         """Transcribe recorded audio."""
         recording_info = self.active_recordings.get(recording_id)
@@ -589,17 +1335,27 @@ class Speech2TextService(ServiceInterface):
             return
 
         audio_file = recording_info.get("audio_file")
-        if not audio_file or not os.path.exists(audio_file):
+        # Audio submitted through TranscribeStream arrives as a waveform, not a file.
+        samples = recording_info.get("samples")
+        if samples is None and (not audio_file or not os.path.exists(audio_file)):
             self._emit_threadsafe(self.RecordingError, recording_id, "Audio file not found")
             return
+        source = samples if samples is not None else audio_file
 
+        lag_sampled = False
         try:
             recording_info["status"] = "transcribing"
 
             # Detect silent recordings early to avoid confusing empty transcriptions.
-            rms = self._wav_rms_normalized(audio_file)
-            syslog.syslog(syslog.LOG_INFO, f"Audio RMS (normalized): {rms:.6f}")
-            if rms < 0.001:
+            features = recording_info.get("features")
+            if features is not None:
+                rms = features.rms
+            elif samples is not None:
+                rms = float((samples**2).mean() ** 0.5) if len(samples) else 0.0
+            else:
+                rms = self._wav_rms_normalized(audio_file)
+            log.debug("Audio RMS (normalized): %.6f", rms)
+            if rms < SILENCE_RMS_THRESHOLD:
                 recording_info["status"] = "failed"
                 self._emit_threadsafe(
                     self.RecordingError,
@@ -609,14 +1365,107 @@ class Speech2TextService(ServiceInterface):
                 )
                 return
 
-            syslog.syslog(syslog.LOG_INFO, f"Starting transcription for recording {recording_id}")
+            log.info(f"Starting transcription for recording {recording_id}")
             started = time.time()
+            self._loop.call_soon_threadsafe(self.loop_lag.start)
+            lag_sampled = True
+            profile = recording_info.get("profile", NULL_PROFILE)
+            profile.begin_stage("transcribe", torch_ops=True)
 
+            # Before the model runs, so the inference threads it starts inherit the policy.
+            self._apply_scheduling_policy()
             model = self._load_whisper_model()
             # fp16 is only meaningful/beneficial on GPU; keep it off for CPU.
             use_fp16 = self.whisper_device == "gpu"
-            result = model.transcribe(audio_file, fp16=use_fp16)
-            text = result["text"].strip()
+            duration = self._audio_duration(source, features)
+            # Audio from other applications (TranscribeStream) must not read or update the
+            # user's dictation state: rolling context, sticky language, speed estimates, history.
+            external = recording_info.get("external", False)
+            decode_options = self.decoding_policy.choose(duration, measure=not external)
+            decode_options["fp16"] = use_fp16
+            prompt = None if external else self.decode_context.prompt()
+            language, cached = self._resolve_language(model, external)
+
+            audio_input = source
+            if features is not None:
+                try:
+                    install_mel_passthrough()
+                    audio_input = PrecomputedMel(features.finalize(), source, features.num_samples)
+                except Exception as e:
+                    log.warning(f"Falling back to full feature extraction: {e}")
+
+            copy_to_clipboard = recording_info.get("copy_to_clipboard", False)
+            preview_mode = recording_info.get("preview_mode", False)
+
+            stream = None
+            # Only the decode itself feeds the policy's speed estimates (not model loading).
+            decode_started = time.time()
+            with self.decode_guard.track(model, decode_options["temperature"]) as guarded:
+                if not preview_mode:
+                    # Type each chunk as soon as it is decoded instead of waiting for the whole clip.
+                    stream = _TypingStream(self._typing_executor, self._type_text)
+                    result = self._transcribe_streaming(
+                        model,
+                        audio_input,
+                        lambda piece: stream.feed(self._postprocess_text(piece)),
+                        initial_prompt=prompt,
+                        language=language,
+                        **decode_options,
+                    )
+                else:
+                    result = model.transcribe(
+                        audio_input, initial_prompt=prompt, language=language, **decode_options
+                    )
+                decode_seconds = time.time() - decode_started
+
+                if cached:
+                    segments = result.get("segments", [])
+                    avg_logprob = (
+                        sum(seg.get("avg_logprob", 0.0) for seg in segments) / len(segments)
+                        if segments
+                        else 0.0
+                    )
+                    # Same threshold whisper uses for its own fallback decision.
+                    if avg_logprob < -1.0:
+                        log.info(
+                            f"Low confidence with sticky language {language} (avg_logprob={avg_logprob:.2f}); "
+                            "re-detecting"
+                        )
+                        self.sticky_language = None
+                        # Streamed text has already been typed; only re-run when nothing was output yet.
+                        if stream is None:
+                            language = None
+                            result = model.transcribe(audio_input, initial_prompt=prompt, **decode_options)
+
+            if language is None and not external:
+                self.language_detections += 1
+                if self.whisper_language == "auto-sticky":
+                    self.sticky_language = result.get("language")
+
+            raw_text = result["text"].strip()
+            # Streamed pieces were post-processed one by one; report what was actually typed.
+            text = stream.text if stream is not None else self._postprocess_text(raw_text)
+
+            # A segment decoded at the n-th temperature of the schedule needed n extra passes.
+            temperatures = decode_options["temperature"]
+            fallbacks = sum(
+                min(
+                    range(len(temperatures)),
+                    key=lambda i: abs(temperatures[i] - seg.get("temperature", 0.0)),
+                )
+                for seg in result.get("segments", [])
+            )
+            elapsed = time.time() - started
+            if external:
+                rtf = decode_seconds / duration if duration > 0 else 0.0
+            else:
+                rtf = self.decoding_policy.record(decode_options, duration, decode_seconds)
+            decoding = describe_options(decode_options)
+            recording_info["decoding"] = decoding
+            recording_info["rtf"] = rtf
+            self.transcriptions_total += 1
+            self.temperature_fallbacks_total += fallbacks
+            recording_info["temperature_fallbacks"] = fallbacks
 
             if not text:
                 recording_info["status"] = "failed"
@@ -631,29 +1480,54 @@ class Speech2TextService(ServiceInterface):
 
             recording_info["text"] = text
             recording_info["status"] = "completed"
+            # The model is prompted with its own output style, not the post-processed text.
+            if not external:
+                self.decode_context.append(model, raw_text)
+            # Text is ready: release the temp file and recording slot before output runs.
+            self._cleanup_recording(recording_id)
 
-            syslog.syslog(
-                syslog.LOG_INFO,
-                f"Transcription finished for {recording_id} in {time.time() - started:.1f}s (chars={len(text)})",
+            log.info(
+                f"Transcription finished for {recording_id} in {elapsed:.1f}s "
+                f"(chars={len(text)}, prompt_tokens={self.decode_context.token_count}, "
+                f"temperature_fallbacks={fallbacks}, policy={self.decoding_policy}, "
+                f"decoding={decoding}, duration={duration:.1f}s, rtf={rtf:.2f}, "
+                f"loop_aborts={guarded['aborts']}, segments_skipped={guarded['skipped']}, "
+                f"segments_truncated={guarded['truncated']}, "
+                f"decode_seconds_saved={guarded['seconds_saved']:.1f})"
             )
+            profile.end_stage("transcribe")
             self._emit_threadsafe(self.TranscriptionReady, recording_id, text)
-
-            copy_to_clipboard = recording_info.get("copy_to_clipboard", False)
-            preview_mode = recording_info.get("preview_mode", False)
-
-            if not preview_mode:
-                if self._type_text(text):
-                    self._emit_threadsafe(self.TextTyped, text, True)
-                else:
-                    self._emit_threadsafe(self.TextTyped, text, False)
-
-            if copy_to_clipboard:
-                self._copy_to_clipboard(text)
+            self._deliver_text(text, not preview_mode, copy_to_clipboard, stream, profile)
+
+            if self.history is not None and not external:
+                completed_at = time.time()
+                started_at = recording_info.get("started_at", started)
+                self.history.add(
+                    {
+                        "recording_id": recording_id,
+                        "created_at": started_at,
+                        "completed_at": completed_at,
+                        "model": self.whisper_model_name,
+                        "language": result.get("language"),
+                        "record_seconds": recording_info.get("recorded_at", started) - started_at,
+                        "transcribe_seconds": completed_at - started,
+                        "decoding": decoding,
+                        "rtf": rtf,
+                        "text": text,
+                    }
+                )
 
         except Exception as e:
             recording_info["status"] = "failed"
             self._emit_threadsafe(self.RecordingError, recording_id, f"Transcription failed: {str(e)}")
         finally:
+            self.last_model_use = time.time()
+            if lag_sampled:
+                try:
+                    self._loop.call_soon_threadsafe(self.loop_lag.stop)
+                except RuntimeError:
+                    # Loop closed during shutdown.
+                    pass
             try:
                 if audio_file and os.path.exists(audio_file):
                     os.unlink(audio_file)
@@ -679,17 +1553,109 @@ class Speech2TextService(ServiceInterface):
             if changed:
                 # Force reload on next transcription.
                 self.whisper_model = None
+                # Tokenizer may differ between models (e.g. .en vs multilingual).
+                self.decode_context.reset(drop_tokenizer=True)
+                self.sticky_language = None
+                self.decoding_policy.reset_estimates()
                 # Dependencies are device-dependent.
                 self.dependencies_checked = False
                 self.missing_deps = []
 
-            syslog.syslog(
-                syslog.LOG_INFO,
-                f"Whisper config set: model={self.whisper_model_name}, device={self.whisper_device}",
+            log.info(f"Whisper config set: model={self.whisper_model_name}, device={self.whisper_device}")
+            return True
+        except Exception as e:
+            log.error(f"Failed to set Whisper config: {e}")
+            return False
+
+    @method()
+    def SetDecodingPolicy(self, preset: "s", deadline: "d") -> "b":
+        """
+        Select a decoding preset ("fast", "balanced" or "accurate").
+
+        deadline is the target transcription time in seconds; 0 uses the preset's default,
+        which scales with clip duration.
+        """
+        try:
+            deadline = float(deadline)
+            if not math.isfinite(deadline):
+                raise ValueError("deadline must be finite")
+            self.decoding_policy = DecodingPolicy((preset or "balanced").strip().lower(), deadline)
+            log.info(f"Decoding policy set: {self.decoding_policy}")
+            return True
+        except Exception as e:
+            log.error(f"Failed to set decoding policy: {e}")
+            return False
+
+    @method()
+    def SetWhisperLanguage(self, language: "s") -> "b":
+        """Set transcription language: "auto", "auto-sticky" or a language code/name."""
+        try:
+            validated = self._validate_whisper_language(language)
+            if validated != self.whisper_language:
+                self.whisper_language = validated
+                self.sticky_language = None
+            log.info(f"Whisper language set: {self.whisper_language}")
+            return True
+        except Exception as e:
+            log.error(f"Failed to set Whisper language: {e}")
+            return False
+
+    @method()
+    def SetModelIdleTimeout(self, minutes: "i") -> "b":
+        """Unload the Whisper model after this many minutes without a recording (0 disables)."""
+        try:
+            self.model_idle_timeout = max(0, int(minutes)) * 60.0
+            log.info(f"Model idle timeout set: {max(0, int(minutes))} min")
+            return True
+        except Exception as e:
+            log.error(f"Failed to set model idle timeout: {e}")
+            return False
+
+    @method()
+    def SetInferenceScheduling(self, nice: "i", batch: "b", reserved_cpus: "i", scope: "b") -> "b":
+        """
+        Configure CPU scheduling of inference threads.
+
+        nice is 0..19, batch selects SCHED_BATCH, reserved_cpus keeps that many CPUs free for
+        the desktop, scope moves the whole service process into a low-weight systemd user
+        scope (turning it off restores the scope's default weight).
+        """
+        try:
+            self.scheduling_policy = SchedulingPolicy(nice, batch, reserved_cpus, scope)
+            try:
+                import torch  # type: ignore
+
+                torch.set_num_threads(self.scheduling_policy.inference_threads())
+            except Exception:
+                pass
+            log.info(f"Inference scheduling set: {self.scheduling_policy}")
+            return True
+        except Exception as e:
+            log.error(f"Failed to set inference scheduling: {e}")
+            return False
+
+    @method()
+    def SetSilenceDetection(self, silence_timeout: "d", no_input_timeout: "d") -> "b":
+        """
+        Configure live silence detection (seconds; 0 disables).
+
+        silence_timeout ends a recording once input has been silent that long after speech.
+        no_input_timeout aborts a recording if no input is heard at all within that time.
+        """
+        try:
+            silence_timeout = float(silence_timeout)
+            no_input_timeout = float(no_input_timeout)
+            if not (math.isfinite(silence_timeout) and math.isfinite(no_input_timeout)):
+                raise ValueError("timeouts must be finite")
+            self.silence_timeout = min(max(0.0, silence_timeout), 300.0)
+            self.no_input_timeout = min(max(0.0, no_input_timeout), 300.0)
+            log.info(
+                f"Silence detection set: silence_timeout={self.silence_timeout}, "
+                f"no_input_timeout={self.no_input_timeout}"
             )
             return True
         except Exception as e:
-            syslog.syslog(syslog.LOG_ERR, f"Failed to set Whisper config: {e}")
+            log.error(f"Failed to set silence detection: {e}")
             return False
 
     @method()
@@ -702,6 +1668,7 @@ class Speech2TextService(ServiceInterface):
 
             recording_id = str(uuid.uuid4())
             duration = min(max(1, int(duration)), 300)  # 1s to 5min
+            self.last_model_use = time.time()
 
             self.active_recordings[recording_id] = {
                 "id": recording_id,
@@ -717,15 +1684,54 @@ class Speech2TextService(ServiceInterface):
             thread.daemon = True
             thread.start()
 
+            # If the model was evicted, reload it while the user is still speaking.
+            self._prefetch_whisper_model()
+
             return recording_id
 
         except Exception as e:
             error_msg = str(e)
-            print(f"StartRecording error: {error_msg}")
+            log.error(f"StartRecording error: {error_msg}")
             dummy_id = str(uuid.uuid4())
             self._emit_threadsafe(self.RecordingError, dummy_id, error_msg)
             return dummy_id
 
+    @method()
+    def TranscribeStream(self, fd: "h", audio_format: "s") -> "s":
+        """
+        Transcribe raw PCM read from a Unix file descriptor (pipe or memfd) until EOF.
+
+        audio_format is "<s16le|f32le>[:<rate>[:<channels>]]". Results are delivered with the
+        RecordingStarted/RecordingStopped/TranscriptionReady/RecordingError signals for the
+        returned id; the text is not typed. StopRecording/CancelRecording work on the id.
+        """
+        recording_id = f"{STREAM_ID_PREFIX}{uuid.uuid4()}"
+        try:
+            pcm_format = parse_format(audio_format)
+        except ValueError as e:
+            os.close(fd)
+            log.error(f"TranscribeStream rejected: {e}")
+            self._emit_threadsafe(self.RecordingError, recording_id, str(e))
+            return recording_id
+
+        self.last_model_use = time.time()
+        self.active_recordings[recording_id] = {
+            "id": recording_id,
+            "copy_to_clipboard": False,
+            "preview_mode": True,
+            "external": True,
+            "status": "starting",
+            "created_at": datetime.now(),
+            "stop_requested": False,
+        }
+
+        thread = threading.Thread(target=self._read_stream, args=(recording_id, fd, pcm_format))
+        thread.daemon = True
+        thread.start()
+
+        self._prefetch_whisper_model()
+        return recording_id
+
     @method()
     def StopRecording(self, recording_id: "s") -> "b":
         """Stop an active recording."""
@@ -746,7 +1752,7 @@ class Speech2TextService(ServiceInterface):
             return True
 
         except Exception as e:
-            print(f"StopRecording error: {e}")
+            log.error(f"StopRecording error: {e}")
             return False
 
     @method()
@@ -757,7 +1763,7 @@ class Speech2TextService(ServiceInterface):
             if not recording_info:
                 return False
 
-            print(f"Cancelling recording {recording_id}")
+            log.info(f"Cancelling recording {recording_id}")
             recording_info["status"] = "cancelled"
             recording_info["stop_requested"] = True
 
@@ -767,27 +1773,33 @@ class Speech2TextService(ServiceInterface):
             return True
 
         except Exception as e:
-            print(f"CancelRecording error: {e}")
+            log.error(f"CancelRecording error: {e}")
             return False
 
     @method()
-    def TypeText(self, text: "s", copy_to_clipboard: "b") -> "b":
+    async def TypeText(self, text: "s", copy_to_clipboard: "b") -> "b":
         """Type provided text directly."""
         try:
-            success = True
-
-            if not self._type_text(text):
-                success = False
+            # In preview mode the extension types the text of the last transcription here.
+            profile = self.profiler.awaiting_output()
 
+            # Run off the event loop so D-Bus stays responsive while xdotool types.
+            clipboard = None
             if copy_to_clipboard:
-                if not self._copy_to_clipboard(text):
-                    print("Failed to copy to clipboard")
+                clipboard = self._clipboard_executor.submit(self._copy_to_clipboard, text)
+
+            success, copied = await self._loop.run_in_executor(
+                self._typing_executor, self._type_profiled, profile, text, clipboard
+            )
+
+            if not copied:
+                log.warning("Failed to copy to clipboard")
 
             self.TextTyped(text, success)
             return success
 
         except Exception as e:
-            print(f"TypeText error: {e}")
+            log.error(f"TypeText error: {e}")
             self.TextTyped(text, False)
             return False
 
@@ -807,14 +1819,109 @@ class Speech2TextService(ServiceInterface):
                 ]
             )
 
+            logging_stats = log_stats()
+            guard = self.decode_guard.stats()
+            loop_lag = self.loop_lag.stats()
+            lookups = self.language_cache_hits + self.language_detections
+            hit_rate = self.language_cache_hits / lookups if lookups else 0.0
+
             return (
                 f"ready:active_recordings={active_count},"
-                f"model={self.whisper_model_name},device={self.whisper_device}"
+                f"model={self.whisper_model_name},device={self.whisper_device},"
+                f"context_tokens={self.decode_context.token_count},"
+                f"transcriptions={self.transcriptions_total},"
+                f"temperature_fallbacks={self.temperature_fallbacks_total},"
+                f"decoding_policy={self.decoding_policy},"
+                f"decode_loop_aborts={guard['aborts']},decode_segments_skipped={guard['skipped']},"
+                f"decode_segments_truncated={guard['truncated']},"
+                f"decode_seconds_saved={guard['seconds_saved']:.1f},"
+                f"language={self.sticky_language or self.whisper_language},"
+                f"language_cache_hit_rate={hit_rate:.2f},"
+                f"model_loaded={self.whisper_model is not None},"
+                f"model_loads={self.model_loads},model_unloads={self.model_unloads},"
+                f"log_records={logging_stats['records']},log_dropped={logging_stats['dropped']},"
+                f"log_emit_us={logging_stats['avg_emit_us']:.1f},"
+                f"scheduling={self.scheduling_policy},"
+                f"loop_lag_p95_ms={loop_lag['p95_ms']:.1f},loop_lag_max_ms={loop_lag['max_ms']:.1f}"
             )
 
         except Exception as e:
             return f"error:{str(e)}"
 
+    @method()
+    def ResetContext(self) -> "b":
+        """Forget the rolling decode context from previous dictations."""
+        try:
+            self.decode_context.reset()
+            self.sticky_language = None
+            log.info("Decode context reset")
+            return True
+        except Exception as e:
+            log.error(f"ResetContext error: {e}")
+            return False
+
+    @method()
+    async def GetHistory(self, before_id: "x", limit: "i") -> "a(xsdssddssd)":
+        """
+        Newest-first page of transcription history.
+
+        Pass before_id=0 for the first page, then the smallest id of the previous page.
+        Each entry is (id, recording_id, created_at, model, language, record_seconds,
+        transcribe_seconds, text, decoding, rtf).
+        """
+        if self.history is None:
+            return []
+        try:
+            return await self._loop.run_in_executor(None, self.history.page, int(before_id), int(limit))
+        except Exception as e:
+            log.error(f"GetHistory error: {e}")
+            return []
+
+    @method()
+    async def SearchHistory(self, query: "s", limit: "i") -> "a(xsdssddssd)":
+        """Full-text search over transcription history, best match first."""
+        if self.history is None:
+            return []
+        try:
+            return await self._loop.run_in_executor(None, self.history.search, query, int(limit))
+        except Exception as e:
+            log.error(f"SearchHistory error: {e}")
+            return []
+
+    @method()
+    def SetHistoryRetention(self, max_entries: "i", max_age_days: "i") -> "b":
+        """
+        Limit history size and age; the limits are kept across restarts.
+
+        0 entries turns history off and deletes stored entries, 0 days keeps entries forever.
+        """
+        if self.history is None:
+            return False
+        self.history.set_retention(max_entries, max_age_days)
+        log.info(
+            f"History retention set: max_entries={self.history.max_entries}, "
+            f"max_age_days={self.history.max_age_days}"
+        )
+        return True
+
+    @method()
+    def ListProfiles(self) -> "a(sdx)":
+        """Profile reports as (recording_id, written_at, size_bytes), newest first."""
+        try:
+            return self.profiler.list()
+        except Exception as e:
+            log.error(f"ListProfiles error: {e}")
+            return []
+
+    @method()
+    async def GetProfile(self, recording_id: "s") -> "s":
+        """Text of the profile report for recording_id ("" if there is none)."""
+        try:
+            return await self._loop.run_in_executor(None, self.profiler.read, recording_id)
+        except Exception as e:
+            log.error(f"GetProfile error: {e}")
+            return ""
+
     @method()
     def CheckDependencies(self) -> "bas":
         """Check if all dependencies are available."""
@@ -851,7 +1958,7 @@ class Speech2TextService(ServiceInterface):
             process = recording_info.get("process")
             if process and process.poll() is None:
                 try:
-                    print(f"Terminating recording process {process.pid}")
+                    log.info(f"Terminating recording process {process.pid}")
                     process.send_signal(signal.SIGINT)
                     time.sleep(0.2)
                     if process.poll() is None:
@@ -860,23 +1967,30 @@ class Speech2TextService(ServiceInterface):
                     if process.poll() is None:
                         process.kill()
                 except Exception as e:
-                    print(f"Error terminating process: {e}")
+                    log.error(f"Error terminating process: {e}")
 
             self._cleanup_recording(recording_id)
 
+        self.loop_lag.close()
+        self._typing_executor.shutdown(wait=False)
+        self._clipboard_executor.shutdown(wait=False)
+        if self.history is not None:
+            self.history.close()
 
-async def _async_main():
+
+async def _async_main(profile=False):
     loop = asyncio.get_running_loop()
-    service = Speech2TextService(loop)
+    service = Speech2TextService(loop, profile=profile)
 
-    bus = await MessageBus().connect()
+    # Unix fd passing is needed for TranscribeStream.
+    bus = await MessageBus(negotiate_unix_fd=True).connect()
     bus.export(OBJECT_PATH, service)
     await bus.request_name(BUS_NAME)
 
-    print("Starting Speech2Text D-Bus service main loop (asyncio)...")
+    log.info("Starting Speech2Text D-Bus service main loop (asyncio)...")
 
     def _handle_shutdown(signum=None):
-        print(f"Received signal {signum}, shutting down...")
+        log.info(f"Received signal {signum}, shutting down...")
         try:
             service.shutdown()
         finally:
@@ -903,15 +2017,22 @@ async def _async_main():
     return 0
 
 
-def main():
+def main(debug=None, profile=None):
     """Main function to start the D-Bus service."""
+    if debug is None:
+        debug = "--debug" in sys.argv[1:]
+    if profile is None:
+        profile = debug or "--profile" in sys.argv[1:]
+    setup_logging(debug)
     try:
-        return asyncio.run(_async_main())
+        return asyncio.run(_async_main(profile))
     except KeyboardInterrupt:
         return 0
     except Exception as e:
-        print(f"Error starting service: {e}")
+        log.error(f"Error starting service: {e}")
         return 1
+    finally:
+        shutdown_logging()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,76 @@
+import math
+from types import SimpleNamespace
+
+import numpy as np
+import torch
+from whisper.decoding import DecodingResult
+from whisper.model import ModelDimensions, Whisper
+from whisper.tokenizer import get_tokenizer
+
+from gnome_speech2text_service import degeneration
+from gnome_speech2text_service.degeneration import DegenerationGuard
+
+TOKENIZER = get_tokenizer(True, language="en", task="transcribe")
+
+
+def _task():
+    return SimpleNamespace(
+        tokenizer=TOKENIZER,
+        repetition_filter=SimpleNamespace(stopped=set()),
+        encoder_seconds=0.0,
+        sample_len=224,
+        model=SimpleNamespace(is_multilingual=True, num_languages=99),
+        options=SimpleNamespace(task="transcribe"),
+    )
+
+
+def _judge(guard, text, no_speech_prob):
+    tb = TOKENIZER.timestamp_begin
+    tokens = [tb] + TOKENIZER.encode(text) + [tb + 100]
+    result = DecodingResult(
+        audio_features=None,
+        language="en",
+        tokens=tokens,
+        text=text,
+        avg_logprob=-0.5,
+        no_speech_prob=no_speech_prob,
+        compression_ratio=3.0,
+    )
+    with guard.track(SimpleNamespace(decode=None)):
+        return guard._judge(_task(), result, SimpleNamespace(temperature=0.0), 1.0)
+
+
+def test_loop_without_text_before_it_is_skipped():
+    guard = DegenerationGuard()
+    judged = _judge(guard, " Thank you." * 8, no_speech_prob=0.4)
+
+    assert judged.text == ""
+    assert guard.stats()["skipped"] == 1
+
+
+def test_loop_after_real_text_falls_back_instead_of_skipping():
+    guard = DegenerationGuard()
+    judged = _judge(guard, " Please send the report by Friday." + " Thank you." * 8, no_speech_prob=0.4)
+
+    assert judged.text != ""
+    assert judged.compression_ratio == math.inf
+    assert guard.stats()["skipped"] == 0
+
+
+def test_incompatible_whisper_falls_back_to_model_decode(monkeypatch):
+    torch.manual_seed(0)
+    dims = ModelDimensions(80, 1500, 64, 2, 1, 51865, 448, 64, 2, 1)
+    model = Whisper(dims).eval()
+    audio = np.random.default_rng(0).standard_normal(16000).astype(np.float32) * 0.1
+    expected = model.transcribe(audio, fp16=False, language="en", temperature=0.0)["text"]
+
+    def broken(self, model, options):
+        raise AttributeError("'DecodingTask' object has no attribute 'sample_begin'")
+
+    monkeypatch.setattr(degeneration._GuardedDecodingTask, "__init__", broken)
+    guard = DegenerationGuard()
+    with guard.track(model, 0.0):
+        text = model.transcribe(audio, fp16=False, language="en", temperature=0.0)["text"]
+
+    assert text == expected
+    assert guard._disabled
@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+import torch
+import whisper
+from whisper.audio import N_SAMPLES, SAMPLE_RATE, log_mel_spectrogram
+
+from gnome_speech2text_service.features import _CENTER_PAD, IncrementalLogMel, n_mels_for_model
+
+
+def _feed_in_random_chunks(features, pcm, rng):
+    pos = 0
+    while pos < len(pcm):
+        # Whole int16 samples, as the capture path hands them over.
+        size = int(rng.integers(1, 8000)) * 2
+        features.feed(pcm[pos : pos + size])
+        pos += size
+
+
+@pytest.mark.parametrize("n_mels", [80, 128])
+@pytest.mark.parametrize(
+    "num_samples",
+    [_CENTER_PAD - 7, 7 * SAMPLE_RATE + 123, 42 * SAMPLE_RATE + 17],
+    ids=["shorter-than-pad", "under-30s", "over-30s"],
+)
+def test_incremental_matches_whisper(n_mels, num_samples):
+    rng = np.random.default_rng(num_samples + n_mels)
+    samples = (rng.standard_normal(num_samples) * 3000).clip(-32768, 32767).astype("<i2")
+
+    features = IncrementalLogMel(n_mels)
+    _feed_in_random_chunks(features, samples.tobytes(), rng)
+    mel = features.finalize()
+
+    audio = torch.from_numpy(samples.astype(np.float32) / 32768.0)
+    expected = log_mel_spectrogram(audio, n_mels, padding=N_SAMPLES)
+
+    assert features.num_samples == num_samples
+    assert mel.shape == expected.shape
+    np.testing.assert_allclose(mel.numpy(), expected.numpy(), atol=1e-4)
+
+
+@pytest.mark.parametrize("model_name", whisper.available_models())
+def test_n_mels_for_model_follows_aliases(model_name):
+    # Checkpoints are shared between aliases ("large" is large-v3); only v3 models use 128 bins.
+    url = whisper._MODELS[model_name]
+    v3 = {whisper._MODELS[name] for name in ("large-v3", "large-v3-turbo") if name in whisper._MODELS}
+    assert n_mels_for_model(model_name) == (128 if url in v3 else 80)
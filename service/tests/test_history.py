@@ -0,0 +1,51 @@
+import time
+
+from gnome_speech2text_service.history import HistoryStore
+
+
+def _entry(n):
+    now = time.time()
+    return {"recording_id": f"rec-{n}", "created_at": now, "completed_at": now, "text": f"entry {n}"}
+
+
+def test_entries_include_decoding_and_rtf(tmp_path):
+    store = HistoryStore(str(tmp_path / "history.sqlite3"))
+    store.add(dict(_entry(0), decoding="greedy,temps=0/0.2,condition=True", rtf=0.25))
+    store.close()
+
+    (row,) = store.page()
+    assert row[1] == "rec-0"
+    assert row[-2:] == ["greedy,temps=0/0.2,condition=True", 0.25]
+
+
+def test_retention_survives_restart(tmp_path):
+    path = str(tmp_path / "history.sqlite3")
+    store = HistoryStore(path)
+    store.set_retention(2, 30)
+    for n in range(3):
+        store.add(_entry(n))
+    store.close()
+
+    reopened = HistoryStore(path)
+    try:
+        assert (reopened.max_entries, reopened.max_age_days) == (2, 30)
+        assert [row[1] for row in reopened.page()] == ["rec-2", "rec-1"]
+    finally:
+        reopened.close()
+
+
+def test_turning_history_off_deletes_entries(tmp_path):
+    path = str(tmp_path / "history.sqlite3")
+    store = HistoryStore(path)
+    store.add(_entry(0))
+    store.set_retention(0, 0)
+    store.add(_entry(1))  # dropped: history is off
+    store.close()
+
+    reopened = HistoryStore(path)
+    try:
+        assert reopened.max_entries == 0
+        assert reopened.page() == []
+        assert reopened.search("entry") == []
+    finally:
+        reopened.close()
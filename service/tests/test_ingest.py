@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+import torch
+import torchaudio.functional as AF
+
+from gnome_speech2text_service.ingest import SAMPLE_RATE, PcmConverter, parse_format
+
+
+def _tone(freq, rate, seconds, amplitude=0.5):
+    t = np.arange(int(rate * seconds)) / rate
+    return (amplitude * np.sin(2 * np.pi * freq * t)).astype(np.float32)
+
+
+def _convert_in_random_chunks(converter, data, rng):
+    out = bytearray()
+    pos = 0
+    while pos < len(data):
+        # Arbitrary sizes, not aligned to frames, as a pipe delivers them.
+        size = int(rng.integers(1, 20000))
+        out += converter.feed(data[pos : pos + size])
+        pos += size
+    out += converter.flush()
+    return np.frombuffer(bytes(out), dtype="<i2").astype(np.float32) / 32767.0
+
+
+def _rms(x):
+    return float(np.sqrt(np.mean(x**2)))
+
+
+@pytest.mark.parametrize("rate", [44100, 48000])
+def test_above_nyquist_tone_is_attenuated(rate):
+    tone = _tone(12000, rate, 2.0)
+    converter = PcmConverter(parse_format(f"f32le:{rate}:1"))
+    out = _convert_in_random_chunks(converter, tone.astype("<f4").tobytes(), np.random.default_rng(rate))
+
+    assert _rms(tone) > 0.3
+    assert _rms(out) < 0.01
+
+
+@pytest.mark.parametrize("descriptor", ["s16le:44100:2", "f32le:48000:1", "s16le:22050:1"])
+def test_chunked_matches_whole_stream(descriptor):
+    pcm_format = parse_format(descriptor)
+    rng = np.random.default_rng(len(descriptor))
+    mono = _tone(440, pcm_format.rate, 3.3) + _tone(3000, pcm_format.rate, 3.3, 0.2)
+    frames = np.repeat(mono[:, None], pcm_format.channels, axis=1).reshape(-1)
+    if pcm_format.sample_format == "s16le":
+        data = (frames * 32768.0).astype("<i2").tobytes()
+        mono = np.round(mono * 32768.0) / 32768.0
+    else:
+        data = frames.astype("<f4").tobytes()
+
+    out = _convert_in_random_chunks(PcmConverter(pcm_format), data, rng)
+    expected = AF.resample(torch.from_numpy(mono), pcm_format.rate, SAMPLE_RATE).numpy()
+
+    assert out.shape == expected.shape
+    np.testing.assert_allclose(out, expected, atol=2e-4)
@@ -2,6 +2,9 @@ import Gio from "gi://Gio";
 import GLib from "gi://GLib";
 import { log, getServiceBinaryPath } from "./resourceUtils.js";
 
+// Recording ids of audio other applications submit through TranscribeStream.
+const EXTERNAL_RECORDING_PREFIX = "stream-";
+
 // D-Bus interface XML for the speech2text service
 const Speech2TextInterface = `
 <node>
@@ -124,6 +127,9 @@ export class DBusManager {
       this.dbusProxy.connectSignal(
         "RecordingStarted",
         (proxy, sender, [recordingId]) => {
+          if (recordingId.startsWith(EXTERNAL_RECORDING_PREFIX)) {
+            return;
+          }
           log.debug(`Recording started: ${recordingId}`);
           handlers.onRecordingStarted?.(recordingId);
         }
@@ -134,6 +140,9 @@ export class DBusManager {
       this.dbusProxy.connectSignal(
         "RecordingStopped",
         (proxy, sender, [recordingId, reason]) => {
+          if (recordingId.startsWith(EXTERNAL_RECORDING_PREFIX)) {
+            return;
+          }
           log.debug(`Recording stopped: ${recordingId}, reason: ${reason}`);
           handlers.onRecordingStopped?.(recordingId, reason);
         }
@@ -144,6 +153,9 @@ export class DBusManager {
       this.dbusProxy.connectSignal(
         "TranscriptionReady",
         (proxy, sender, [recordingId, text]) => {
+          if (recordingId.startsWith(EXTERNAL_RECORDING_PREFIX)) {
+            return;
+          }
           log.debug(`Transcription ready: ${recordingId}, text: ${text}`);
           handlers.onTranscriptionReady?.(recordingId, text);
         }
@@ -154,6 +166,9 @@ export class DBusManager {
       this.dbusProxy.connectSignal(
         "RecordingError",
         (proxy, sender, [recordingId, errorMessage]) => {
+          if (recordingId.startsWith(EXTERNAL_RECORDING_PREFIX)) {
+            return;
+          }
           log.warn(`Recording error: ${recordingId}, error: ${errorMessage}`);
           handlers.onRecordingError?.(recordingId, errorMessage);
         }
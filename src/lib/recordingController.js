@@ -94,8 +94,8 @@ export class RecordingController {
     log.debug(
       `RecordingController: Recording stopped - ID: ${recordingId}, reason: ${reason}`
     );
-    if (reason === "completed") {
-      // Recording completed automatically - begin transcription UI.
+    if (reason === "completed" || reason === "silence") {
+      // Recording completed automatically (time limit or end of speech) - begin transcription UI.
       const shouldShowUi =
         this.recordingStateManager.handleRecordingCompleted(recordingId);
       if (shouldShowUi) {